@@ -0,0 +1,183 @@
+# core/cluster.py
+import asyncio
+import bisect
+import hashlib
+import os
+import signal
+import socket
+import time
+import uuid
+
+from config import CLUSTER_HEARTBEAT_SECONDS, CLUSTER_TTL_SECONDS, CLUSTER_VNODES
+from core.metrics import gauge
+from core.store import cluster_beat, cluster_leave, invalidate_subscriptions, share_subscription_changes
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Hashing consistente: si entra o sale un worker, solo se mueve su parte de los productos."""
+
+    def __init__(self, members: list[str], vnodes: int = CLUSTER_VNODES):
+        points = sorted((_hash(f"{m}#{i}"), m) for m in members for i in range(vnodes))
+        self._keys = [h for h, _ in points]
+        self._owners = [m for _, m in points]
+
+    def owner(self, product_id: int) -> str | None:
+        if not self._keys:
+            return None
+        i = bisect.bisect(self._keys, _hash(f"product:{product_id}")) % len(self._keys)
+        return self._owners[i]
+
+
+class Cluster:
+    """
+    Coordinación entre procesos por la misma SQLite (WAL):
+    - heartbeat cada CLUSTER_HEARTBEAT_SECONDS; un worker sin latido por CLUSTER_TTL_SECONDS sale del anillo;
+    - los productos se reparten con hashing consistente entre los workers vivos;
+    - 1 líder por lease (renovado en cada latido): hace polling de Telegram y el mantenimiento.
+    Callbacks: on_rebalance(n_workers) al cambiar el anillo, on_leader(bool) al ganar/perder el liderazgo.
+    """
+
+    def __init__(self, can_lead: bool = True, on_rebalance=None, on_leader=None):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.can_lead = can_lead
+        self.started = time.time()
+        self.members: list[str] = []
+        self.leader_id: str | None = None
+        self.is_leader = False
+        self._ring = HashRing([])
+        self._subs_gen: int | None = None
+        self._on_rebalance = on_rebalance
+        self._on_leader = on_leader
+        self._task: asyncio.Task | None = None
+
+    def owns(self, product_id: int) -> bool:
+        # antes del primer latido (o si la DB no responde) cada worker revisa todo: mejor doble que nada
+        owner = self._ring.owner(product_id)
+        return owner is None or owner == self.worker_id
+
+    async def start(self):
+        share_subscription_changes(True)
+        await self._beat()
+        self._task = asyncio.create_task(self._loop())
+        role = "líder" if self.is_leader else "seguidor"
+        print(f"🧩 Cluster: {self.worker_id} ({role}, {len(self.members)} workers)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await asyncio.to_thread(cluster_leave, self.worker_id)
+        except Exception as e:
+            print(f"⚠️ Cluster: no se pudo salir limpio: {e}")
+        if self.is_leader:
+            await self._set_leader(False)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(CLUSTER_HEARTBEAT_SECONDS)
+            try:
+                await self._beat()
+            except Exception as e:
+                # sin latido el lease vence solo y otro worker toma el mando
+                print(f"⚠️ Cluster heartbeat: {e}")
+
+    async def _beat(self):
+        members, leader_id, subs_gen = await asyncio.to_thread(
+            cluster_beat, self.worker_id, socket.gethostname(), os.getpid(), self.started,
+            CLUSTER_TTL_SECONDS, self.can_lead,
+        )
+
+        if self._subs_gen is not None and subs_gen != self._subs_gen:
+            invalidate_subscriptions()
+        self._subs_gen = subs_gen
+
+        if members != self.members:
+            self.members = members
+            self._ring = HashRing(members)
+            print(f"🧩 Cluster: {len(members)} workers activos")
+            if self._on_rebalance:
+                await self._on_rebalance(len(members))
+
+        self.leader_id = leader_id
+        leader = leader_id == self.worker_id
+        if leader != self.is_leader:
+            await self._set_leader(leader)
+
+    async def _set_leader(self, leader: bool):
+        self.is_leader = leader
+        print("👑 Cluster: este worker es el líder" if leader else "🪑 Cluster: ya no soy el líder")
+        if self._on_leader:
+            try:
+                await self._on_leader(leader)
+            except Exception as e:
+                print(f"⚠️ Cluster: cambio de líder falló: {e}")
+
+
+_cluster: Cluster | None = None
+
+gauge("cluster_workers", "Workers vivos en el anillo", lambda: len(_cluster.members) if _cluster else 1)
+gauge("cluster_is_leader", "1 si este proceso es el líder",
+      lambda: int(_cluster.is_leader) if _cluster else 1)
+
+
+def init_cluster(**kwargs) -> Cluster:
+    global _cluster
+    if _cluster is None:
+        _cluster = Cluster(**kwargs)
+    return _cluster
+
+
+def get_cluster() -> Cluster | None:
+    return _cluster
+
+
+def owns(product_id: int) -> bool:
+    """Sin cluster (modo normal) este proceso es dueño de todo."""
+    return _cluster is None or _cluster.owns(product_id)
+
+
+def is_leader() -> bool:
+    return _cluster is None or _cluster.is_leader
+
+
+async def stop_cluster():
+    global _cluster
+    if _cluster is not None:
+        await _cluster.stop()
+        _cluster = None
+
+
+async def run_until_signal(app):
+    """
+    Ciclo de vida manual (initialize / start / stop, sin updater) para el modo cluster con polling:
+    el polling no arranca aquí sino en on_leader, solo en el worker elegido.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    await app.initialize()
+    if app.post_init:
+        await app.post_init(app)
+    await app.start()
+    try:
+        await stop.wait()
+    finally:
+        print("🛑 Apagando worker…")
+        await stop_cluster()  # suelta el lease primero: otro worker toma el polling enseguida
+        if app.updater and app.updater.running:
+            await app.updater.stop()
+        await app.stop()
+        if app.post_shutdown:
+            await app.post_shutdown(app)
+        await app.shutdown()
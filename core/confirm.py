@@ -0,0 +1,51 @@
+# core/confirm.py
+import asyncio
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from config import CONFIRM_PROBES, CONFIRM_QUORUM, CONFIRM_STAGGER, CONFIRM_CACHE_BUST
+from core.weverse import fetch_status
+
+
+def _bust(url: str, i: int) -> str:
+    # parámetro anti-caché para que ningún CDN nos devuelva la misma copia
+    if not CONFIRM_CACHE_BUST:
+        return url
+    parts = urlsplit(url)
+    extra = f"_cb={time.time_ns()}{i}"
+    query = f"{parts.query}&{extra}" if parts.query else extra
+    return urlunsplit(parts._replace(query=query))
+
+
+async def confirm_available(url: str, probes: int = CONFIRM_PROBES, quorum: int = CONFIRM_QUORUM,
+                            stagger: float = CONFIRM_STAGGER) -> bool:
+    """
+    Lanza `probes` lecturas frescas escalonadas (cada `stagger` s) en paralelo.
+    Devuelve True apenas `quorum` dicen disponible, o False apenas ya no se puede llegar.
+    """
+    async def probe(i: int) -> bool:
+        if i:
+            await asyncio.sleep(i * stagger)
+        # cada sonda sale por una salida distinta del pool (si hay varias)
+        return (await fetch_status(_bust(url, i), conditional=False, rank=i)).available
+
+    tasks = [asyncio.create_task(probe(i)) for i in range(probes)]
+    yes = no = 0
+    try:
+        for fut in asyncio.as_completed(tasks):
+            try:
+                ok = await fut
+            except Exception:
+                ok = False
+            if ok:
+                yes += 1
+            else:
+                no += 1
+            if yes >= quorum:
+                return True
+            if no > probes - quorum:
+                return False
+        return False
+    finally:
+        for t in tasks:
+            t.cancel()
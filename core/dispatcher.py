@@ -0,0 +1,218 @@
+# core/dispatcher.py
+import asyncio
+import itertools
+import time
+
+from telegram.error import RetryAfter, TimedOut, NetworkError, Forbidden, BadRequest
+
+from config import TG_GLOBAL_RATE, TG_CHAT_RATE, TG_GROUP_RATE, TG_WORKERS, TG_SEND_RETRIES
+from core.metrics import (
+    telegram_send_seconds, telegram_sent_total, telegram_failed_total, telegram_retries_total, gauge,
+)
+
+# Prioridades (menor = sale antes)
+PRIORITY_PREMIUM = 0
+PRIORITY_ALERT = 1
+PRIORITY_REMINDER = 2
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.last_used = self.updated
+
+    def _take(self) -> float:
+        """Toma 1 token si hay; si no, devuelve cuánto esperar."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.last_used = now
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while (wait := self._take()) > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class Dispatcher:
+    """
+    Cola de salida a Telegram: prioridad + límites (global y por chat) + N workers.
+    send() nunca bloquea al monitor; los recordatorios se agendan con delay.
+    """
+
+    def __init__(self, bot, workers: int = TG_WORKERS):
+        self.bot = bot
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._global = TokenBucket(TG_GLOBAL_RATE, TG_GLOBAL_RATE)
+        self._chats: dict[int, TokenBucket] = {}
+        self._workers_n = workers
+        self._workers: list[asyncio.Task] = []
+        self._timers: dict[asyncio.TimerHandle, tuple[float, tuple]] = {}  # handle -> (epoch de salida, item)
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+
+    # ---------- API ----------
+    def send(self, chat_id, text: str, priority: int = PRIORITY_ALERT, delay: float = 0, **kwargs):
+        item = (priority, next(self._seq), int(chat_id), text, kwargs, 0)
+        if delay > 0:
+            handle = None
+
+            def fire():
+                self._timers.pop(handle, None)
+                self._queue.put_nowait(item)
+
+            handle = asyncio.get_running_loop().call_later(delay, fire)
+            self._timers[handle] = (time.time() + delay, item)
+        else:
+            self._queue.put_nowait(item)
+
+    def set_share(self, workers: int):
+        """Modo cluster: el límite global de Telegram es por bot, se reparte entre los workers."""
+        rate = TG_GLOBAL_RATE / max(1, workers)
+        self._global.rate = rate
+        self._global.capacity = max(1.0, rate)
+        self._global.tokens = min(self._global.tokens, self._global.capacity)
+
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._timers)
+
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self._workers_n)]
+
+    def snapshot(self) -> list[dict]:
+        """Mensajes agendados (recordatorios) para sobrevivir a un reinicio."""
+        return [
+            {"due": due, "priority": item[0], "chat_id": item[2], "text": item[3], "kwargs": item[4]}
+            for due, item in self._timers.values()
+        ]
+
+    def restore(self, pending: list[dict], max_late: float):
+        """Re-agenda lo que quedó pendiente; lo que ya está demasiado atrasado se descarta."""
+        now = time.time()
+        restored = 0
+        for p in pending:
+            late = now - p["due"]
+            if late > max_late:
+                continue
+            self.send(p["chat_id"], p["text"], priority=p["priority"], delay=max(0.0, -late), **p["kwargs"])
+            restored += 1
+        return restored
+
+    async def stop(self, timeout: float = 5.0) -> list[dict]:
+        """
+        Intenta vaciar la cola (hasta timeout) y apaga los workers.
+        Devuelve lo que no salió (agendado o en cola) para guardarlo.
+        """
+        leftover = self.snapshot()
+        for handle in self._timers:
+            handle.cancel()
+        self._timers.clear()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        for t in self._workers:
+            t.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        now = time.time()
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            leftover.append({"due": now, "priority": item[0], "chat_id": item[2], "text": item[3],
+                             "kwargs": item[4]})
+        return leftover
+
+    # ---------- internos ----------
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 5000:
+                # limpia buckets inactivos
+                cutoff = time.monotonic() - 120
+                self._chats = {k: b for k, b in self._chats.items() if b.last_used >= cutoff}
+            rate = TG_GROUP_RATE if chat_id < 0 else TG_CHAT_RATE
+            bucket = self._chats[chat_id] = TokenBucket(rate, 1)
+        return bucket
+
+    async def _worker(self):
+        while True:
+            item = await self._queue.get()
+            priority, _, chat_id, text, kwargs, attempt = item
+            try:
+                await self._chat_bucket(chat_id).acquire()
+                await self._global.acquire()
+                with telegram_send_seconds.time():
+                    await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                self.sent += 1
+                telegram_sent_total.inc()
+            except RetryAfter as e:
+                # Telegram pidió esperar: frenamos todo ese tiempo y reencolamos
+                self._global.pause(float(e.retry_after))
+                self._requeue(item)
+            except (Forbidden, BadRequest) as e:
+                # usuario bloqueó el bot / chat inválido: no reintentar.
+                # Va antes que NetworkError: en PTB BadRequest es subclase de NetworkError
+                self.failed += 1
+                telegram_failed_total.inc(reason="rejected")
+                print(f"⚠️ Mensaje descartado ({chat_id}): {e}")
+            except (TimedOut, NetworkError) as e:
+                if attempt + 1 < TG_SEND_RETRIES:
+                    self._chat_bucket(chat_id).pause(2 ** attempt)
+                    self._requeue(item)
+                else:
+                    self.failed += 1
+                    telegram_failed_total.inc(reason="network")
+                    print(f"⚠️ No se pudo enviar a {chat_id}: {e}")
+            except Exception as e:
+                self.failed += 1
+                telegram_failed_total.inc(reason="error")
+                print(f"❌ Error enviando a {chat_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _requeue(self, item):
+        priority, seq, chat_id, text, kwargs, attempt = item
+        self.retries += 1
+        telegram_retries_total.inc()
+        self._queue.put_nowait((priority, seq, chat_id, text, kwargs, attempt + 1))
+
+
+_dispatcher: Dispatcher | None = None
+gauge("telegram_queue", "Mensajes esperando en el dispatcher",
+      lambda: _dispatcher.pending() if _dispatcher is not None else 0)
+
+
+def init_dispatcher(bot) -> Dispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = Dispatcher(bot)
+        _dispatcher.start()
+    return _dispatcher
+
+
+def get_dispatcher() -> Dispatcher | None:
+    return _dispatcher
+
+
+async def stop_dispatcher() -> list[dict]:
+    global _dispatcher
+    leftover = []
+    if _dispatcher is not None:
+        leftover = await _dispatcher.stop()
+        _dispatcher = None
+    return leftover
@@ -0,0 +1,188 @@
+# core/egress.py
+import random
+import time
+
+import httpx
+
+from config import (
+    EGRESS_PROXIES, EGRESS_SOURCE_ADDRESSES, EGRESS_DIRECT, EGRESS_EXPLORE, USER_AGENTS,
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_WRITE_TIMEOUT, HTTP_POOL_TIMEOUT,
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY,
+)
+from core.metrics import Counter, gauge
+from core.resilience import CircuitOpen, breaker_for
+
+_EWMA_ALPHA = 0.3
+_DEFAULT_LATENCY = 1.0  # s, hasta tener mediciones (así se prueban todas al principio)
+
+egress_requests_total = Counter("egress_requests_total", "Requests por salida (proxy / IP de origen)")
+
+_BASE_HEADERS = {
+    "Accept-Language": "en-US,en;q=0.9,pt-BR;q=0.8,es;q=0.7",
+    "Cache-Control": "no-cache",
+    "Pragma": "no-cache",
+}
+
+
+def _http2_available() -> bool:
+    # HTTP/2 necesita el extra "h2" (httpx[http2]); si no está, seguimos en HTTP/1.1
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class Egress:
+    """
+    1 salida a internet (directa, por proxy o por una IP local) con su propio pool de conexiones.
+    Guarda latencia (EWMA) y requests en vuelo para elegir la más rápida.
+    """
+
+    def __init__(self, name: str, proxy: str | None = None, local_address: str | None = None,
+                 user_agent: str = USER_AGENTS[0]):
+        self.name = name
+        self.proxy = proxy
+        self.local_address = local_address
+        self.user_agent = user_agent
+        self.latency = _DEFAULT_LATENCY
+        self.inflight = 0
+        self.served = 0
+        self.errors = 0
+        self.client = self._build_client()
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = _http2_available()
+        limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+        transport = httpx.AsyncHTTPTransport(
+            http2=http2, limits=limits, proxy=self.proxy, local_address=self.local_address,
+        )
+        return httpx.AsyncClient(
+            transport=transport,
+            headers={**_BASE_HEADERS, "User-Agent": self.user_agent},
+            follow_redirects=True,
+            timeout=httpx.Timeout(
+                connect=HTTP_CONNECT_TIMEOUT,
+                read=HTTP_READ_TIMEOUT,
+                write=HTTP_WRITE_TIMEOUT,
+                pool=HTTP_POOL_TIMEOUT,
+            ),
+        )
+
+    def score(self) -> float:
+        # menor = mejor; los requests en vuelo penalizan para repartir carga.
+        # Una salida sin medir va primero (1 vez) para tener su latencia real.
+        if not (self.served or self.errors):
+            return 0.0
+        return self.latency * (1 + self.inflight)
+
+    def begin(self):
+        self.inflight += 1
+        return time.perf_counter()
+
+    def abort(self):
+        """El request se canceló (p. ej. una sonda de quórum que perdió): no es error ni mide latencia."""
+        self.inflight -= 1
+
+    def end(self, started: float, ok: bool):
+        self.inflight -= 1
+        egress_requests_total.inc(egress=self.name, result="ok" if ok else "error")
+        if ok:
+            elapsed = time.perf_counter() - started
+            # la primera medición reemplaza al valor por defecto
+            self.latency = elapsed if not self.served else (1 - _EWMA_ALPHA) * self.latency + _EWMA_ALPHA * elapsed
+            self.served += 1
+        else:
+            # un error la manda al fondo enseguida (el breaker la saca del todo si sigue fallando)
+            self.errors += 1
+            self.latency = min(self.latency * 2 + 0.5, HTTP_READ_TIMEOUT)
+
+
+class EgressPool:
+    """
+    Elige por dónde sale cada chequeo: la salida sana (circuito cerrado para ese host) con mejor puntaje.
+    rank=i devuelve la i-ésima mejor, para repartir las sondas de confirmación entre salidas distintas.
+    Un EGRESS_EXPLORE de los chequeos va a otra salida al azar para no quedarse con latencias viejas.
+    """
+
+    def __init__(self, egresses: list[Egress]):
+        if not egresses:
+            raise ValueError("el pool de salidas está vacío")
+        self.egresses = egresses
+
+    def acquire(self, url: str, rank: int = 0) -> tuple[Egress, object]:
+        """(salida, breaker) ya habilitado con before_request(); CircuitOpen si ninguna puede."""
+        # todos los breakers existen desde el primer uso: open_wait() ve si queda alguna salida libre
+        breakers = {e.name: breaker_for(url, e.name) for e in self.egresses}
+        candidates = sorted(((e.score(), i, e) for i, e in enumerate(self.egresses)))
+        ordered = [e for _, _, e in candidates]
+        if not rank and len(ordered) > 1 and random.random() < EGRESS_EXPLORE:
+            rank = random.randrange(1, len(ordered))
+        if rank:
+            k = rank % len(ordered)
+            ordered = ordered[k:] + ordered[:k]
+        blocked: CircuitOpen | None = None
+        for egress in ordered:
+            breaker = breakers[egress.name]
+            try:
+                breaker.before_request()
+            except CircuitOpen as e:
+                if blocked is None or e.retry_in < blocked.retry_in:
+                    blocked = e
+                continue
+            return egress, breaker
+        raise blocked
+
+    def get(self, name: str) -> Egress | None:
+        return next((e for e in self.egresses if e.name == name), None)
+
+    def default_client(self) -> httpx.AsyncClient:
+        return self.egresses[0].client
+
+    async def aclose(self):
+        for e in self.egresses:
+            if not e.client.is_closed:
+                await e.client.aclose()
+
+    def summary(self) -> str:
+        return " · ".join(f"{e.name} {e.latency * 1000:.0f}ms ({e.served}✓/{e.errors}✗)" for e in self.egresses)
+
+
+def build_egresses(proxies: list[str] = EGRESS_PROXIES, sources: list[str] = EGRESS_SOURCE_ADDRESSES,
+                   direct: bool = EGRESS_DIRECT) -> list[Egress]:
+    """Arma las salidas desde config: directa (opcional) + 1 por IP local + 1 por proxy."""
+    specs = []
+    if direct or not (proxies or sources):
+        specs.append(("direct", None, None))
+    specs += [(f"src:{addr}", None, addr) for addr in sources]
+    specs += [(f"proxy{i + 1}", proxy, None) for i, proxy in enumerate(proxies)]
+    # cada salida con su User-Agent fijo (rotarlo en cada request se ve menos humano)
+    return [Egress(name, proxy=proxy, local_address=addr, user_agent=USER_AGENTS[i % len(USER_AGENTS)])
+            for i, (name, proxy, addr) in enumerate(specs)]
+
+
+_pool: EgressPool | None = None
+
+gauge("egress_pool_size", "Salidas configuradas en el pool", lambda: len(_pool.egresses) if _pool else 0)
+
+
+def init_pool(egresses: list[Egress] | None = None) -> EgressPool:
+    global _pool
+    if _pool is None:
+        _pool = EgressPool(egresses if egresses is not None else build_egresses())
+    return _pool
+
+
+def get_pool() -> EgressPool:
+    return init_pool()
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.aclose()
+        _pool = None
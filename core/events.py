@@ -0,0 +1,88 @@
+# core/events.py
+import time
+
+from config import EVENT_SOLDOUT_CHECKS, ALERT_COOLDOWN_SECONDS
+from core.store import log_event, event_seed
+
+RESTOCK_CANDIDATE = "restock_candidate"
+SOLDOUT = "soldout"
+
+
+class RestockDetector:
+    """
+    Estado por producto con histéresis:
+    - 🟢 -> 🔴 solo tras EVENT_SOLDOUT_CHECKS lecturas agotadas seguidas (evita rebotes).
+    - 🔴 -> 🟢 devuelve un candidato; el monitor confirma por quórum y llama a confirm_restock().
+    Los eventos se guardan en la tabla events; el estado se siembra desde product_memory al arrancar,
+    así un restock ocurrido durante un deploy igual se detecta.
+    """
+
+    def __init__(self):
+        self.status: dict[int, bool] = {}
+        self._soldout_streak: dict[int, int] = {}
+        self._last_event_ts: dict[int, int] = {}
+        self._last_alert_ts: dict[int, int] = {}
+        self.seeded = False
+
+    def seed(self, product_ids: set[int] | None = None):
+        for product_id, last_status, last_event_ts, last_alert_ts in event_seed():
+            if product_ids is not None and product_id not in product_ids:
+                continue
+            if last_status is not None:
+                self.status[product_id] = bool(last_status)
+            if last_event_ts:
+                self._last_event_ts[product_id] = last_event_ts
+            if last_alert_ts:
+                self._last_alert_ts[product_id] = last_alert_ts
+        self.seeded = True
+
+    def _record(self, product_id: int, kind: str, alerted: bool = False):
+        now = int(time.time())
+        prev_ts = self._last_event_ts.get(product_id)
+        log_event(product_id, kind, now, duration_s=now - prev_ts if prev_ts else None, alerted=alerted)
+        self._last_event_ts[product_id] = now
+        if alerted:
+            self._last_alert_ts[product_id] = now
+
+    def observe(self, product_id: int, available: bool) -> str | None:
+        prev = self.status.get(product_id)
+        if prev is None:
+            # primera lectura sin historia: solo sembrar
+            self.status[product_id] = available
+            return None
+
+        if prev and not available:
+            streak = self._soldout_streak.get(product_id, 0) + 1
+            self._soldout_streak[product_id] = streak
+            if streak >= EVENT_SOLDOUT_CHECKS:
+                self.status[product_id] = False
+                self._soldout_streak[product_id] = 0
+                self._record(product_id, "soldout")
+                return SOLDOUT
+            return None
+
+        self._soldout_streak[product_id] = 0
+        if not prev and available:
+            return RESTOCK_CANDIDATE
+        return None
+
+    def confirm_restock(self, product_id: int) -> bool:
+        """Marca el restock confirmado. Devuelve True si corresponde avisar (fuera del cooldown)."""
+        self.status[product_id] = True
+        last_alert = self._last_alert_ts.get(product_id)
+        alert = last_alert is None or time.time() - last_alert >= ALERT_COOLDOWN_SECONDS
+        self._record(product_id, "restock", alerted=alert)
+        return alert
+
+    def reseed(self, product_ids: set[int]):
+        """Productos que llegan de otro worker (modo cluster): partir de lo que quedó en la DB."""
+        for product_id in product_ids:
+            self.forget(product_id)
+        self.seed(product_ids)
+
+    def forget(self, product_id: int):
+        for d in (self.status, self._soldout_streak, self._last_event_ts, self._last_alert_ts):
+            d.pop(product_id, None)
+
+
+detector = RestockDetector()
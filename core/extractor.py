@@ -0,0 +1,96 @@
+# core/extractor.py
+import json
+
+# Nombres de campo típicos del estado Next.js / API de la tienda
+_NAME_KEYS = ("saleOptionName", "optionName", "name", "title")
+_SOLDOUT_KEYS = ("isSoldOut", "soldOut", "soldout")
+_STOCK_KEYS = ("stockQuantity", "saleStockQuantity", "remainQuantity", "stock")
+_STATUS_KEYS = ("saleStatus", "stockStatus", "status")
+
+_STATUS_ON = {"SALE", "ON_SALE", "AVAILABLE", "IN_STOCK", "SELLING"}
+_STATUS_OFF = {"SOLD_OUT", "SOLDOUT", "OUT_OF_STOCK", "COMING_SOON", "PREPARING", "END", "STOP", "PAUSE"}
+
+
+def _option_state(node: dict) -> bool | None:
+    for k in _SOLDOUT_KEYS:
+        if isinstance(node.get(k), bool):
+            return not node[k]
+    for k in _STOCK_KEYS:
+        v = node.get(k)
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            return v > 0
+    for k in _STATUS_KEYS:
+        v = str(node.get(k, "")).upper()
+        if v in _STATUS_ON:
+            return True
+        if v in _STATUS_OFF:
+            return False
+    return None
+
+
+def _option_name(node: dict, fallback: str) -> str:
+    for k in _NAME_KEYS:
+        if isinstance(node.get(k), str) and node[k].strip():
+            return node[k].strip()
+    return str(node.get("id") or node.get("saleOptionId") or fallback)
+
+
+# Dónde está el stock en el JSON de Next.js de la tienda (no se adivina en el resto del árbol:
+# recomendaciones u otros bloques con "status"/"name" no deciden el veredicto)
+_SALE_PATH = ("props", "pageProps", "sale")
+_OPTIONS_KEY = "saleOptions"
+
+_MARKER = 'id="__NEXT_DATA__"'
+_END = "</script>"
+
+
+def _dig(data, path):
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def extract_options(data) -> dict[str, bool] | None:
+    """
+    {opción: disponible} desde props.pageProps.sale del __NEXT_DATA__.
+    Con saleOptions se usan esas; si no, el estado a nivel venta. None si no hay nada reconocible.
+    """
+    sale = _dig(data, _SALE_PATH)
+    if not isinstance(sale, dict):
+        return None
+
+    options: dict[str, bool] = {}
+    for i, node in enumerate(sale.get(_OPTIONS_KEY) or []):
+        if not isinstance(node, dict):
+            continue
+        state = _option_state(node)
+        if state is not None:
+            name = _option_name(node, f"#{i + 1}")
+            options[name] = options.get(name, False) or state
+    if options:
+        return options
+
+    state = _option_state(sale)
+    return {_option_name(sale, "#1"): state} if state is not None else None
+
+
+def embedded_json(raw: bytes) -> bytes | None:
+    """Contenido crudo del <script id="__NEXT_DATA__">, o None si la página no lo trae."""
+    i = raw.find(_MARKER.encode())
+    if i < 0:
+        return None
+    start = raw.find(b">", i) + 1
+    end = raw.find(_END.encode(), start)
+    if start == 0 or end < 0:
+        return None
+    return raw[start:end]
+
+
+def embedded_options(payload: bytes) -> dict[str, bool] | None:
+    try:
+        return extract_options(json.loads(payload))
+    except ValueError:
+        return None
+
@@ -0,0 +1,130 @@
+# core/httpserver.py
+import asyncio
+import json
+
+_REASONS = {200: "OK", 204: "No Content", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+            405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+_MAX_BODY = 1024 * 1024
+_READ_TIMEOUT = 15.0  # por lectura (headers o cuerpo): una conexión lenta o colgada no queda abierta
+
+
+class Request:
+    def __init__(self, method: str, path: str, headers: dict, body: bytes, target: str | None = None):
+        self.method = method
+        self.path = path
+        self.headers = headers  # claves en minúsculas
+        self.body = body
+        self.target = target or path  # tal cual vino (con query; URL absoluta si es un proxy)
+
+    def json(self):
+        return json.loads(self.body or b"null")
+
+
+def json_response(data, status: int = 200):
+    return status, {"Content-Type": "application/json"}, json.dumps(data).encode()
+
+
+def text_response(text: str, status: int = 200, content_type: str = "text/plain; charset=utf-8"):
+    return status, {"Content-Type": content_type}, text.encode()
+
+
+class HttpServer:
+    """
+    Servidor HTTP/1.1 mínimo sobre asyncio (sin dependencias extra).
+    Rutas: route("GET", "/healthz", handler) con handler async (Request) -> (status, headers, body).
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._routes: dict[tuple[str, str], object] = {}
+        self._fallback = None
+        self._server: asyncio.AbstractServer | None = None
+
+    def route(self, method: str, path: str, handler):
+        self._routes[(method.upper(), path)] = handler
+
+    def fallback(self, handler):
+        """Handler para todo lo que no tenga ruta (p. ej. un proxy de pruebas)."""
+        self._fallback = handler
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # si port=0 el SO elige uno libre
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), _READ_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError,
+                        asyncio.TimeoutError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._send(writer, *text_response("bad request", 400), keep_alive=False)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+
+                if "chunked" in headers.get("transfer-encoding", "").lower():
+                    await self._send(writer, *text_response("length required", 411), keep_alive=False)
+                    return
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._send(writer, *text_response("bad content-length", 400), keep_alive=False)
+                    return
+                if length > _MAX_BODY:
+                    await self._send(writer, *text_response("too large", 413), keep_alive=False)
+                    return
+                try:
+                    body = await asyncio.wait_for(reader.readexactly(length), _READ_TIMEOUT) if length else b""
+                except (asyncio.IncompleteReadError, ConnectionError, asyncio.TimeoutError):
+                    return
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                request = Request(method.upper(), target.split("?", 1)[0], headers, body, target)
+                await self._send(writer, *(await self._dispatch(request)), keep_alive=keep_alive)
+                if not keep_alive:
+                    return
+        except Exception as e:
+            print(f"⚠️ HTTP: {e}")
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: Request):
+        handler = self._routes.get((request.method, request.path)) or self._fallback
+        if handler is None:
+            if any(path == request.path for _, path in self._routes):
+                return text_response("method not allowed", 405)
+            return text_response("not found", 404)
+        try:
+            return await handler(request)
+        except Exception as e:
+            print(f"❌ HTTP {request.path}: {e}")
+            return text_response("error", 500)
+
+    @staticmethod
+    async def _send(writer, status: int, headers: dict, body: bytes, keep_alive: bool):
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}"]
+        headers = {**headers, "Content-Length": str(len(body)),
+                   "Connection": "keep-alive" if keep_alive else "close"}
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
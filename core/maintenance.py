@@ -0,0 +1,36 @@
+# core/maintenance.py
+import asyncio
+import time
+
+from config import RAW_RETENTION_DAYS, ROLLUP_RETENTION_DAYS, PURGE_BATCH, VACUUM_PAGES
+from core.store import purge_checks_before, purge_rollups_before, compact_db
+from core.cluster import is_leader
+
+
+async def _purge(fn, cutoff_ts: int) -> int:
+    # lotes chicos: entre cada uno el writer queda libre para los logs del monitor
+    total = 0
+    while True:
+        deleted = await asyncio.to_thread(fn, cutoff_ts, PURGE_BATCH)
+        total += deleted
+        if deleted < PURGE_BATCH:
+            return total
+        await asyncio.sleep(0.05)
+
+
+async def maintenance_job(context):
+    """
+    Job periódico: los checks crudos viejos ya están resumidos en checks_hourly
+    (se actualiza en cada insert), así que solo se purgan; luego se compacta la DB.
+    """
+    if not is_leader():
+        return  # en modo cluster solo purga/compacta el líder
+    now = int(time.time())
+    try:
+        raw = await _purge(purge_checks_before, now - RAW_RETENTION_DAYS * 86400)
+        rollups = await _purge(purge_rollups_before, now - ROLLUP_RETENTION_DAYS * 86400)
+        await asyncio.to_thread(compact_db, VACUUM_PAGES)
+        if raw or rollups:
+            print(f"🧹 DB: {raw} checks y {rollups} horas purgadas")
+    except Exception as e:
+        print(f"⚠️ Mantenimiento DB falló: {e}")
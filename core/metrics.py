@@ -0,0 +1,199 @@
+# core/metrics.py
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Buckets en segundos: de 1 ms a 10 s (cubre parseo, DB, red y Telegram)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()  # el writer de la DB observa desde otro hilo
+_registry: dict[str, "_Metric"] = {}
+
+
+def _labels_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _fmt_labels(key: tuple, extra: tuple = ()) -> str:
+    items = key + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        _registry[name] = self
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _labels_key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def total(self) -> float:
+        with _lock:
+            return sum(self._values.values())
+
+    def render(self) -> list[str]:
+        with _lock:  # copia bajo lock: inc() puede agregar claves desde otro hilo
+            items = list(self._values.items())
+        return self._header() + [f"{self.name}{_fmt_labels(k)} {v:g}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Valor leído al exponer (callback), p. ej. tamaño de una cola."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn=None):
+        super().__init__(name, help)
+        self._fn = fn
+        self._value = 0.0
+
+    def set(self, value: float):
+        self._value = value
+
+    def value(self) -> float:
+        if self._fn is None:
+            return self._value
+        try:
+            return float(self._fn())
+        except Exception:
+            return 0.0
+
+    def render(self) -> list[str]:
+        return self._header() + [f"{self.name} {self.value():g}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(buckets)
+        # labels -> [conteos por bucket (+Inf al final), suma, n]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _labels_key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def stats(self, **labels) -> tuple[int, float, float]:
+        """(n, promedio, p95 aproximado por bucket) en segundos."""
+        with _lock:
+            series = self._series.get(_labels_key(labels))
+            if not series or not series[2]:
+                return 0, 0.0, 0.0
+            counts, total, n = list(series[0]), series[1], series[2]
+        target, acc, p95 = 0.95 * n, 0, float("inf")
+        for bound, c in zip(self.buckets + (float("inf"),), counts):
+            acc += c
+            if acc >= target:
+                p95 = bound
+                break
+        return n, total / n, p95
+
+    def render(self) -> list[str]:
+        with _lock:  # copia bajo lock: observe() llega desde el hilo de la DB
+            snapshot = [(key, list(counts), total, n) for key, (counts, total, n) in self._series.items()]
+        lines = self._header()
+        for key, counts, total, n in snapshot:
+            acc = 0
+            for bound, c in zip(self.buckets, counts):
+                acc += c
+                lines.append(f"{self.name}_bucket{_fmt_labels(key, (('le', f'{bound:g}'),))} {acc}")
+            lines.append(f"{self.name}_bucket{_fmt_labels(key, (('le', '+Inf'),))} {n}")
+            lines.append(f"{self.name}_sum{_fmt_labels(key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_fmt_labels(key)} {n}")
+        return lines
+
+
+def render() -> str:
+    """Formato de texto de Prometheus (para GET /metrics)."""
+    lines = []
+    for metric in _registry.values():
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+# ---------- Métricas del bot ----------
+# Fases de un chequeo (fetch_status)
+phase_seconds = Histogram("weverse_phase_seconds", "Tiempo por fase del chequeo (connect, ttfb, body, parse)")
+check_seconds = Histogram("weverse_check_seconds", "Duración total de un chequeo por modo")
+db_write_seconds = Histogram("store_write_seconds", "Duración de cada lote de escrituras en SQLite")
+telegram_send_seconds = Histogram("telegram_send_seconds", "Duración de send_message")
+
+checks_total = Counter("checks_total", "Chequeos realizados")
+check_errors_total = Counter("check_errors_total", "Chequeos con error")
+checks_skipped_total = Counter("checks_skipped_total", "Chequeos saltados con el circuito abierto")
+alerts_total = Counter("alerts_total", "Restocks confirmados y avisados")
+telegram_sent_total = Counter("telegram_sent_total", "Mensajes enviados a Telegram")
+telegram_failed_total = Counter("telegram_failed_total", "Mensajes descartados")
+telegram_retries_total = Counter("telegram_retries_total", "Reintentos de envío a Telegram")
+
+_started = time.time()
+Gauge("process_uptime_seconds", "Segundos desde el arranque", lambda: time.time() - _started)
+
+
+def gauge(name: str, help: str, fn) -> Gauge:
+    """Registra una cola u otro valor que se lee al exponer (los módulos la registran al cargar)."""
+    return Gauge(name, help, fn)
+
+
+def summary() -> str:
+    """Resumen compacto para el comando /metrics de admin."""
+    def ms(hist, **labels):
+        n, avg, p95 = hist.stats(**labels)
+        if not n:
+            return "—"
+        p95_txt = f"{p95 * 1000:.0f}" if p95 != float("inf") else ">10000"
+        return f"{avg * 1000:.0f} / {p95_txt} ms (n={n})"
+
+    lines = ["📈 Métricas (promedio / p95)", "━━━━━━━━━━━━━━"]
+    for phase in ("connect", "ttfb", "body", "parse"):
+        lines.append(f"• {phase}: {ms(phase_seconds, phase=phase)}")
+    with _lock:
+        modes = sorted({dict(k).get("mode", "") for k in check_seconds._series})
+    for mode in modes:
+        lines.append(f"• check {mode}: {ms(check_seconds, mode=mode)}")
+    lines.append(f"• DB lote: {ms(db_write_seconds)}")
+    lines.append(f"• Telegram send: {ms(telegram_send_seconds)}")
+    lines.append("")
+    lines.append(f"✅ Chequeos: {checks_total.total():g}  ❌ Errores: {check_errors_total.total():g}")
+    lines.append(f"🚨 Alertas: {alerts_total.total():g}")
+    lines.append(f"📤 Telegram: {telegram_sent_total.total():g} enviados, "
+                 f"{telegram_retries_total.total():g} reintentos, {telegram_failed_total.total():g} descartados")
+    gauges = [m for m in _registry.values() if isinstance(m, Gauge) and m.name != "process_uptime_seconds"]
+    if gauges:
+        lines.append("📦 Colas: " + ", ".join(f"{g.name}={g.value():g}" for g in gauges))
+    return "\n".join(lines)
@@ -3,14 +3,30 @@ import asyncio
 import time
 from datetime import datetime, timezone, timedelta
 
-from config import CHAT_ID, PRODUCT_NAME, PRODUCT_URL, DOUBLE_CONFIRM_WAIT, ALERT_REPEAT
-from core.weverse import fetch_page, is_available
-from core.scheduler import is_peak_time
-from utils.state import is_peak_enabled, is_silent_enabled, get_silent_window
-from core.store import init_db, log_check, update_memory
+from config import ALERT_REPEAT, ALERT_REPEAT_SECONDS, MAX_CONCURRENT_CHECKS, RUN_MONITOR
+from core.weverse import get_status
+from core.confirm import confirm_available
+from core.events import detector, RESTOCK_CANDIDATE
+from core.metrics import checks_total, check_errors_total, check_seconds, alerts_total, checks_skipped_total
+from core.resilience import CircuitOpen, open_wait
+from core.cluster import owns
+from core import warmstart
+from core.dispatcher import init_dispatcher, PRIORITY_PREMIUM, PRIORITY_ALERT, PRIORITY_REMINDER
+from utils.premium import is_premium
+from core.scheduler import is_peak_time, next_delay, current_interval_seconds
+from core.store import log_check, update_memory, list_products, product_audience, peak_subscribers
 
-last_status = None
 last_check_mode = None  # "PEAK" o "NORMAL"
+_semaphore: asyncio.Semaphore | None = None
+_in_progress: set[int] = set()  # productos con un chequeo corriendo
+_owned: set[int] | None = None  # productos revisados en el último tick (cambia al rebalancear el cluster)
+
+def _get_semaphore() -> asyncio.Semaphore:
+    # se crea perezoso para quedar ligado al loop del bot
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHECKS)
+    return _semaphore
 
 def now_sp_iso() -> str:
     sp = datetime.now(timezone.utc) + timedelta(hours=-3)
@@ -20,124 +36,197 @@ def now_sp_hhmm() -> str:
     sp = datetime.now(timezone.utc) + timedelta(hours=-3)
     return sp.strftime("%H:%M")
 
-def _hm_to_minutes(hm: str) -> int:
-    h, m = hm.split(":")
-    return int(h) * 60 + int(m)
-
-def in_silent_window() -> bool:
-    if not is_silent_enabled():
-        return False
-
-    start_hm, end_hm = get_silent_window()
-    start = _hm_to_minutes(start_hm)
-    end = _hm_to_minutes(end_hm)
-
+def now_sp_minute() -> int:
     sp = datetime.now(timezone.utc) + timedelta(hours=-3)
-    now = sp.hour * 60 + sp.minute
-
-    if start == end:
-        return False
-    if start < end:
-        return start <= now < end
-    return now >= start or now < end
-
-
-async def double_confirm_available() -> bool:
-    html1 = await asyncio.to_thread(fetch_page)
-    if not is_available(html1):
-        return False
-
-    await asyncio.sleep(DOUBLE_CONFIRM_WAIT)
-
-    html2 = await asyncio.to_thread(fetch_page)
-    return is_available(html2)
+    return sp.hour * 60 + sp.minute
 
 
-async def send_repeated_alerts(context, mode_name: str, latency_ms: int, ts: str):
-    silent_now = in_silent_window()
-    hhmm = now_sp_hhmm()
-
-    if silent_now:
-        header = "💜✅ Restock detectado (modo silencioso)"
-    else:
-        header = "💜🚨 ARMY ALERT 🚨💜"
-
-    msg = (
+def _alert_text(header: str, product_name: str, product_url: str, options, hhmm: str,
+                mode_name: str, latency_ms: int) -> str:
+    return (
         f"{header}\n\n"
         "🟢 ¡RESTOCK CONFIRMADO! ✨\n\n"
-        f"🛒 {PRODUCT_NAME}\n"
-        f"🕒 {hhmm} (SP)\n"
+        f"🛒 {product_name}\n"
+        + (f"🎯 Opciones: {', '.join(options)}\n" if options else "")
+        + f"🕒 {hhmm} (SP)\n"
         f"🧠 Modo: {mode_name}\n"
         f"⚡ Respuesta: {latency_ms}ms\n\n"
         "🔥 CORRE ARMY, ES AHORA 🔥\n"
-        f"👉 {PRODUCT_URL}"
+        f"👉 {product_url}"
     )
-    await context.bot.send_message(chat_id=CHAT_ID, text=msg)
 
-    # Si está en silencio, no repetimos spam
-    if silent_now:
-        return
 
-    for i in range(2, ALERT_REPEAT + 1):
-        await asyncio.sleep(10)
-        await context.bot.send_message(
-            chat_id=CHAT_ID,
-            text=f"🚨 ({i}/{ALERT_REPEAT}) ¡Sigue intentando! 👉 {PRODUCT_URL}"
-        )
+async def send_repeated_alerts(context, product, mode_name: str, latency_ms: int, ts: str,
+                               options: list[str] | None = None):
+    product_id, product_name, product_url, _ = product
+    hhmm = now_sp_hhmm()
 
+    loud = _alert_text("💜🚨 ARMY ALERT 🚨💜", product_name, product_url, options, hhmm, mode_name, latency_ms)
+    quiet = _alert_text("💜✅ Restock detectado (modo silencioso)", product_name, product_url, options, hhmm,
+                        mode_name, latency_ms)
 
-async def _run_check(context, mode_name: str):
-    global last_status, last_check_mode
-    init_db()
-    last_check_mode = mode_name
+    dispatcher = init_dispatcher(context.bot)
+    recipients = await asyncio.to_thread(alert_recipients, product_id, now_sp_minute())
+    for chat_id, premium, silenced in recipients:
+        dispatcher.send(chat_id, quiet if silenced else loud,
+                        priority=PRIORITY_PREMIUM if premium else PRIORITY_ALERT,
+                        disable_notification=silenced)
+
+    # recordatorios agendados en la cola: el monitor no espera.
+    # Quien está en silencio no recibe repeticiones.
+    for i in range(2, ALERT_REPEAT + 1):
+        for chat_id, _, silenced in recipients:
+            if silenced:
+                continue
+            dispatcher.send(
+                chat_id,
+                f"🚨 ({i}/{ALERT_REPEAT}) ¡Sigue intentando! 👉 {product_url}",
+                priority=PRIORITY_REMINDER,
+                delay=ALERT_REPEAT_SECONDS * (i - 1),
+            )
+
+
+def alert_recipients(product_id: int, minute: int) -> list[tuple[int, bool, bool]]:
+    """Suscriptores del producto, premium primero. [(chat_id, premium, silenciado)]"""
+    audience = []
+    for chat_id, silenced in product_audience(product_id, minute):
+        premium = is_premium(chat_id)
+        # Silencio es premium, igual que Pico: si se revocó, la alerta vuelve a sonar
+        audience.append((chat_id, premium, silenced and premium))
+    audience.sort(key=lambda r: not r[1])
+    return audience
+
+
+def any_peak_enabled() -> bool:
+    # Pico es premium: cuenta solo si el usuario sigue siendo premium
+    return any(is_premium(chat_id) for chat_id in peak_subscribers())
+
+
+async def _check_product(context, product, mode_name: str):
+    product_id, _, url, _ = product
+    # nunca 2 chequeos del mismo producto a la vez (p. ej. /pico re-agenda mientras corre un tick)
+    if product_id in _in_progress:
+        return
+    _in_progress.add(product_id)
+    try:
+        await _check_product_once(context, product, mode_name)
+    finally:
+        _in_progress.discard(product_id)
 
+
+async def _check_product_once(context, product, mode_name: str):
+    product_id, _, url, _ = product
     ts = now_sp_iso()
     start = time.perf_counter()
 
     try:
-        html = await asyncio.to_thread(fetch_page)
-        current = bool(is_available(html))
+        async with _get_semaphore():
+            result = await get_status(url)
+        current = result.available
         latency_ms = int((time.perf_counter() - start) * 1000)
 
-        # log + memoria
-        log_check(ts=ts, mode=mode_name, available=int(current), latency_ms=latency_ms, error=None)
-        update_memory(new_status=int(current), check_ts=ts)
+        # log + memoria (un resultado compartido ya lo registró quien hizo el fetch)
+        if not result.shared:
+            checks_total.inc(mode=mode_name)
+            check_seconds.observe(latency_ms / 1000, mode=mode_name)
+            log_check(mode=mode_name, available=int(current), latency_ms=latency_ms, error=None,
+                      product_id=product_id, egress=result.egress)
+        update_memory(product_id=product_id, new_status=int(current), check_ts=ts)
+
+        # 🔴 -> 🟢 : confirmar por quórum, registrar evento y avisar
+        if detector.observe(product_id, current) == RESTOCK_CANDIDATE:
+            if await confirm_available(url) and detector.confirm_restock(product_id):
+                alerts_total.inc()
+                await send_repeated_alerts(context, product, mode_name=mode_name, latency_ms=latency_ms, ts=ts,
+                                          options=result.options_in_stock())
+
+    except CircuitOpen:
+        # Weverse en pausa: no hubo request, no cuenta como chequeo ni como error
+        checks_skipped_total.inc(mode=mode_name)
+        return
+    except Exception as e:
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        checks_total.inc(mode=mode_name)
+        check_errors_total.inc(mode=mode_name, error=type(e).__name__)
+        log_check(mode=mode_name, available=0, latency_ms=latency_ms, error=str(e),
+                  product_id=product_id, egress=getattr(e, "egress", None))
+        return
 
-        if last_status is None:
-            last_status = current
-            return
 
-        # 🔴 -> 🟢 : confirmar doble y avisar
-        if (not last_status) and current:
-            if await double_confirm_available():
-                await send_repeated_alerts(context, mode_name=mode_name, latency_ms=latency_ms, ts=ts)
-                last_status = True
-                return
+async def _adopt(owned: set[int]):
+    # productos que eran de otro worker: su último estado está en la DB, no en nuestra memoria
+    global _owned
+    gained = owned - _owned if _owned is not None else set()
+    _owned = owned
+    if gained:
+        await asyncio.to_thread(detector.reseed, gained)
 
-        last_status = current
 
-    except Exception as e:
-        latency_ms = int((time.perf_counter() - start) * 1000)
-        log_check(ts=ts, mode=mode_name, available=0, latency_ms=latency_ms, error=str(e))
-        return
+async def _run_check(context, mode_name: str):
+    global last_check_mode
+    last_check_mode = mode_name
 
+    if not detector.seeded:
+        await asyncio.to_thread(detector.seed)
 
-async def monitor_peak(context):
-    # Solo corre si el usuario activó el modo pico
-    if not is_peak_enabled():
-        return
-    # y solo en hora pico real
-    if not is_peak_time():
-        return
-    await _run_check(context, "PEAK")
+    # todos los productos ON (de este worker, en modo cluster) en un solo tick, en paralelo
+    products = [p for p in await asyncio.to_thread(list_products, True) if owns(p[0])]
+    await _adopt({p[0] for p in products})
+    await asyncio.gather(*(_check_product(context, p, mode_name) for p in products))
 
 
-async def monitor_normal(context):
-    # Siempre corre fuera de pico, o cuando pico está desactivado
-    if is_peak_enabled() and is_peak_time():
-        return
-    await _run_check(context, "NORMAL")
+MONITOR_JOB = "monitor"
+next_check_delay: float | None = None
+
+
+def monitors_here() -> bool:
+    """Este proceso corre el monitor y (en cluster) es dueño de algún producto activo."""
+    if not RUN_MONITOR:
+        return False
+    return any(owns(p[0]) for p in list_products(True))
+
+
+def schedule_monitor(job_queue, when: float):
+    """Deja 1 solo job one-shot de monitoreo (reemplaza el que hubiera)."""
+    for job in job_queue.get_jobs_by_name(MONITOR_JOB):
+        job.schedule_removal()
+    job_queue.run_once(monitor_tick, when=when, name=MONITOR_JOB)
+
+
+async def monitor_tick(context):
+    # PEAK = Pico activado por el usuario y hora pico real
+    global next_check_delay
+    peak = await asyncio.to_thread(any_peak_enabled)
+    mode = "PEAK" if peak and is_peak_time() else "NORMAL"
+    try:
+        await _run_check(context, mode)
+    finally:
+        # el próximo chequeo se agenda recién al terminar este: sin despertares vacíos
+        try:
+            next_check_delay = await asyncio.to_thread(next_delay, peak)
+        except Exception as e:
+            print(f"⚠️ Scheduler: {e}")
+            next_check_delay = float(current_interval_seconds())
+        # con el circuito abierto no tiene sentido despertar antes de que se pueda probar de nuevo
+        next_check_delay = max(next_check_delay, open_wait())
+        schedule_monitor(context.job_queue, next_check_delay)
+        warmstart.mark_first_check()
+        try:
+            warmstart.save(last_check_mode, next_check_delay)
+        except Exception as e:
+            print(f"⚠️ Estado no guardado: {e}")
+
+
+def restore_schedule(mode: str | None, delay: float | None):
+    """Arranque en caliente: /info muestra el último modo y delay hasta que corra el primer tick."""
+    global last_check_mode, next_check_delay
+    last_check_mode = last_check_mode or mode
+    next_check_delay = next_check_delay or delay
 
 
 def get_last_mode() -> str:
-    return last_check_mode or "N/A"
\ No newline at end of file
+    return last_check_mode or "N/A"
+
+
+def get_next_delay() -> str:
+    return f"{int(next_check_delay)}s" if next_check_delay else "N/A"
\ No newline at end of file
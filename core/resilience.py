@@ -0,0 +1,141 @@
+# core/resilience.py
+import random
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from config import BREAKER_FAILURES, BREAKER_BASE_SECONDS, BREAKER_MAX_SECONDS, RETRY_AFTER_MAX_SECONDS
+from core.metrics import Counter, gauge
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Respuestas que indican "el sitio está saturado / caído" (no un problema de la página)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+breaker_trips_total = Counter("weverse_breaker_trips_total", "Veces que se abrió el circuito por host y salida")
+breaker_rejected_total = Counter("weverse_breaker_rejected_total", "Requests evitados con el circuito abierto")
+
+
+class CircuitOpen(Exception):
+    """El host está en pausa: no se hizo el request."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} en pausa ({retry_in:.0f}s)")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After en segundos o como fecha HTTP."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return max(0.0, min(seconds, RETRY_AFTER_MAX_SECONDS))
+
+
+class HostBreaker:
+    """
+    Circuit breaker por host (y salida, ver core/egress.py):
+    - closed: todo pasa; BREAKER_FAILURES fallos seguidos (o un Retry-After) lo abren.
+    - open: nadie sale a la red hasta que vence la pausa (backoff exponencial con jitter).
+    - half_open: pasa 1 solo request de prueba; si sale bien se cierra, si no vuelve a abrir más largo.
+    """
+
+    def __init__(self, host: str, egress: str = "direct"):
+        self.host = host
+        self.egress = egress
+        self.name = host if egress == "direct" else f"{host} vía {egress}"
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0            # aperturas seguidas (sube el backoff)
+        self.open_until = 0.0
+        self._probing = False
+
+    def _backoff(self) -> float:
+        # exponencial con "equal jitter": la mitad fija + la mitad al azar (evita sincronizar réplicas)
+        base = min(BREAKER_MAX_SECONDS, BREAKER_BASE_SECONDS * 2 ** max(0, self.trips - 1))
+        return base / 2 + random.uniform(0, base / 2)
+
+    def retry_in(self) -> float:
+        return max(0.0, self.open_until - time.monotonic()) if self.state == OPEN else 0.0
+
+    def before_request(self):
+        """Llamar antes de salir a la red; lanza CircuitOpen si hay que esperar."""
+        if self.state == CLOSED:
+            return
+        if self.state == OPEN:
+            wait = self.retry_in()
+            if wait > 0:
+                breaker_rejected_total.inc()
+                raise CircuitOpen(self.name, wait)
+            self.state = HALF_OPEN
+        # half_open: solo 1 prueba a la vez
+        if self._probing:
+            breaker_rejected_total.inc()
+            raise CircuitOpen(self.name, 0)
+        self._probing = True
+
+    def record_success(self):
+        if self.state != CLOSED:
+            print(f"✅ {self.name}: responde de nuevo, circuito cerrado")
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._probing = False
+
+    def record_failure(self, retry_after: float | None = None):
+        self.failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self.failures >= BREAKER_FAILURES or retry_after:
+            self.trips += 1
+            pause = max(self._backoff(), retry_after or 0.0)
+            self.state = OPEN
+            self.open_until = time.monotonic() + pause
+            self.failures = 0
+            breaker_trips_total.inc(host=self.host, egress=self.egress)
+            print(f"🛑 {self.name}: circuito abierto {pause:.0f}s (apertura #{self.trips})")
+
+    def release(self):
+        """El request terminó sin veredicto (p. ej. cancelado): libera la prueba de half_open."""
+        self._probing = False
+
+
+# (host, egress) -> breaker: un 429 a una IP de salida no frena a las demás
+_breakers: dict[tuple[str, str], HostBreaker] = {}
+
+
+def breaker_for(url: str, egress: str = "direct") -> HostBreaker:
+    host = urlsplit(url).netloc.lower()
+    breaker = _breakers.get((host, egress))
+    if breaker is None:
+        breaker = _breakers[(host, egress)] = HostBreaker(host, egress)
+    return breaker
+
+
+def open_wait() -> float:
+    """Segundos hasta que el host más demorado vuelva a aceptar requests por alguna salida (0 si hay alguna OK)."""
+    per_host: dict[str, float] = {}
+    for (host, _), b in _breakers.items():
+        per_host[host] = min(per_host.get(host, float("inf")), b.retry_in())
+    return max(per_host.values(), default=0.0)
+
+
+def breaker_summary() -> str:
+    paused = [b for b in _breakers.values() if b.state != CLOSED]
+    if not paused:
+        return "OK"
+    return " · ".join(f"{b.name} en pausa {b.retry_in():.0f}s" if b.state == OPEN else f"{b.name} probando"
+                      for b in paused)
+
+
+gauge("weverse_breakers_open", "Hosts con el circuito abierto o en prueba",
+      lambda: sum(b.state != CLOSED for b in _breakers.values()))
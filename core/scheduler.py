@@ -1,6 +1,12 @@
 # core/scheduler.py
-from datetime import datetime, time
-from config import BASE_SECONDS, PEAK_SECONDS
+import time as _time
+from datetime import datetime, time, timezone, timedelta
+from config import (
+    BASE_SECONDS, PEAK_SECONDS, ADAPTIVE_MAX_SECONDS,
+    ADAPTIVE_LATENCY_FACTOR, ADAPTIVE_PROFILE_TTL,
+    ADAPTIVE_MIN_EVENTS, ADAPTIVE_FULL_EVENTS, ADAPTIVE_PRIOR,
+)
+from core.store import peak_hours_by_changes, recent_health
 
 # Picos (Brasil São Paulo):
 # 20:30–02:30 y 05:30–06:30
@@ -9,6 +15,10 @@ PEAK_WINDOWS = [
     (time(5, 30), time(6, 30)),
 ]
 
+# Perfil aprendido: hora SP -> restocks vistos (se refresca cada ADAPTIVE_PROFILE_TTL)
+_profile: dict[int, int] = {}
+_profile_at = 0.0
+
 def _in_window(now_t: time, start: time, end: time) -> bool:
     if start <= end:
         return start <= now_t <= end
@@ -19,4 +29,63 @@ def is_peak_time() -> bool:
     return any(_in_window(now_t, s, e) for s, e in PEAK_WINDOWS)
 
 def current_interval_seconds() -> int:
-    return PEAK_SECONDS if is_peak_time() else BASE_SECONDS
\ No newline at end of file
+    return PEAK_SECONDS if is_peak_time() else BASE_SECONDS
+
+def _restock_profile() -> dict[int, int]:
+    global _profile, _profile_at
+    if _time.monotonic() - _profile_at >= ADAPTIVE_PROFILE_TTL or not _profile_at:
+        _profile = {int(hour): int(hits) for hour, hits in peak_hours_by_changes(24)}
+        _profile_at = _time.monotonic()
+    return _profile
+
+def restock_likelihood(sp_hour: int) -> float | None:
+    """
+    0..1 según los restocks históricos de esa hora (y media de las vecinas).
+    None con menos de ADAPTIVE_MIN_EVENTS: 1 restock suelto no puede dejar las otras 23 horas en 0.
+    ADAPTIVE_PRIOR suma una base pareja a cada hora para que las horas sin datos no caigan a 0.
+    """
+    profile = _restock_profile()
+    if sum(profile.values()) < ADAPTIVE_MIN_EVENTS:
+        return None
+    top = max(profile.values())
+    score = profile.get(sp_hour, 0) + 0.5 * (
+        profile.get((sp_hour - 1) % 24, 0) + profile.get((sp_hour + 1) % 24, 0)
+    )
+    return min(1.0, (score + ADAPTIVE_PRIOR) / (top + ADAPTIVE_PRIOR))
+
+def _slow_ceiling() -> float:
+    """Techo del delay: de BASE_SECONDS a ADAPTIVE_MAX_SECONDS a medida que crece el historial."""
+    total = sum(_restock_profile().values())
+    span = max(1, ADAPTIVE_FULL_EVENTS - ADAPTIVE_MIN_EVENTS)
+    confidence = min(1.0, max(0.0, (total - ADAPTIVE_MIN_EVENTS) / span))
+    return BASE_SECONDS + (ADAPTIVE_MAX_SECONDS - BASE_SECONDS) * confidence
+
+def next_delay(peak_enabled: bool) -> float:
+    """
+    Segundos hasta el próximo chequeo.
+    - Piso: PEAK_SECONDS con Pico ON, BASE_SECONDS con Pico OFF.
+    - Entre piso y ADAPTIVE_MAX_SECONDS según la probabilidad de restock de la hora.
+    - Más lento si el sitio anda lento o con errores.
+    Sin historial suficiente se comporta como antes (60s en ventana pico con Pico ON, si no 180s),
+    y el techo se acerca a ADAPTIVE_MAX_SECONDS recién con ADAPTIVE_FULL_EVENTS restocks.
+    """
+    floor = PEAK_SECONDS if peak_enabled else BASE_SECONDS
+    in_window = peak_enabled and is_peak_time()
+
+    sp = datetime.now(timezone.utc) + timedelta(hours=-3)
+    likelihood = restock_likelihood(sp.hour)
+    if likelihood is None:
+        delay = float(PEAK_SECONDS if in_window else BASE_SECONDS)
+    else:
+        if in_window:
+            likelihood = 1.0
+        ceiling = max(floor, _slow_ceiling())
+        delay = floor + (ceiling - floor) * (1.0 - likelihood)
+
+    n, errors, avg_ms = recent_health()
+    if n:
+        delay *= 1.0 + 2.0 * (errors / n)  # errores -> bajar el ritmo
+    if avg_ms:
+        delay = max(delay, avg_ms / 1000 * ADAPTIVE_LATENCY_FACTOR)
+
+    return max(float(floor), min(delay, float(ADAPTIVE_MAX_SECONDS)))
@@ -1,18 +1,101 @@
 # core/store.py
+import asyncio
+import json
+import queue
 import sqlite3
 import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
+from utils.state import is_peak_enabled, is_silent_enabled, get_silent_window
+from utils.premium import list_premium
+from config import CHAT_ID, PRODUCT_NAME, PRODUCT_URL, STORE_READ_POOL, STORE_FLUSH_SECONDS, STORE_BATCH_MAX
+from core.metrics import db_write_seconds, gauge
+
 DB_PATH = os.path.join(os.path.dirname(__file__), "bot.db")
 
-def _conn():
+# Conexiones largas: 1 escritora (con lock) + pool chico de lectoras.
+# sqlite3 ya cachea los statements preparados por texto SQL (cached_statements).
+_writer: sqlite3.Connection | None = None
+_writer_lock = threading.Lock()
+_readers: queue.SimpleQueue = queue.SimpleQueue()
+_readers_open = 0
+_readers_lock = threading.Lock()
+
+# Cola write-behind (logs + memoria), se vacía en lotes por _writer_loop
+_write_queue: asyncio.Queue | None = None
+_writer_task: asyncio.Task | None = None
+gauge("store_write_queue", "Escrituras pendientes en la cola write-behind",
+      lambda: _write_queue.qsize() if _write_queue is not None else 0)
+_loop: asyncio.AbstractEventLoop | None = None
+
+def _open():
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    c = sqlite3.connect(DB_PATH)
+    c = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
     c.execute("PRAGMA journal_mode=WAL;")
+    c.execute("PRAGMA synchronous=NORMAL;")
+    c.execute("PRAGMA busy_timeout=5000;")
     return c
 
+@contextmanager
+def _write():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _open()
+        try:
+            yield _writer
+            _writer.commit()
+        except Exception:
+            _writer.rollback()
+            raise
+
+@contextmanager
+def _read():
+    global _readers_open
+    try:
+        con = _readers.get_nowait()
+    except queue.Empty:
+        with _readers_lock:
+            _readers_open += 1
+        con = _open()
+    try:
+        yield con
+    finally:
+        if _readers_open <= STORE_READ_POOL:
+            _readers.put(con)
+        else:
+            with _readers_lock:
+                _readers_open -= 1
+            con.close()
+
+def close_db():
+    global _writer, _readers_open
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+    while True:
+        try:
+            _readers.get_nowait().close()
+        except queue.Empty:
+            break
+    _readers_open = 0
+
+def _columns(con, table: str) -> set[str]:
+    return {row[1] for row in con.execute(f"PRAGMA table_info({table})")}
+
 def init_db():
-    with _conn() as con:
+    """Crea/migra el esquema. Se llama 1 sola vez al arrancar."""
+    with _write() as con:
+        if con.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0:
+            # DB nueva: INCREMENTAL solo se puede elegir antes de crear la primera tabla
+            # (en una DB existente hace falta un VACUUM completo: ver enable_incremental_vacuum).
+            # El VACUUM de una DB vacía es instantáneo y aplica el cambio al header ya creado por WAL.
+            con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            con.execute("VACUUM")
         con.execute("""
         CREATE TABLE IF NOT EXISTS status_memory(
             id INTEGER PRIMARY KEY CHECK (id=1),
@@ -29,84 +112,695 @@ def init_db():
             latency_ms INTEGER NOT NULL,
             error TEXT
         )""")
-        con.execute("INSERT OR IGNORE INTO status_memory(id,last_status,last_change_ts,last_check_ts) VALUES (1,NULL,NULL,NULL)")
-        con.commit()
+        con.execute("""
+        CREATE TABLE IF NOT EXISTS products(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            url TEXT NOT NULL UNIQUE,
+            enabled INTEGER NOT NULL DEFAULT 1  -- 0/1
+        )""")
+        con.execute("""
+        CREATE TABLE IF NOT EXISTS product_memory(
+            product_id INTEGER PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+            last_status INTEGER,
+            last_change_ts TEXT,
+            last_check_ts TEXT
+        )""")
+        if "product_id" not in _columns(con, "checks"):
+            con.execute("ALTER TABLE checks ADD COLUMN product_id INTEGER")
 
-def get_memory():
-    with _conn() as con:
-        row = con.execute("SELECT last_status,last_change_ts,last_check_ts FROM status_memory WHERE id=1").fetchone()
-        return row  # (status int/None, change_ts, check_ts)
-
-def update_memory(new_status: int, check_ts: str):
-    with _conn() as con:
-        old = con.execute("SELECT last_status,last_change_ts FROM status_memory WHERE id=1").fetchone()
-        old_status = old[0]
-        change_ts = old[1]
-
-        # if first time or changed -> set new change_ts
-        if old_status is None or int(old_status) != int(new_status):
-            change_ts = check_ts
-            con.execute("UPDATE status_memory SET last_status=?, last_change_ts=?, last_check_ts=? WHERE id=1",
-                        (int(new_status), change_ts, check_ts))
-        else:
-            con.execute("UPDATE status_memory SET last_check_ts=? WHERE id=1", (check_ts,))
-        con.commit()
+        # producto base de config.py (solo la primera vez)
+        if con.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 0:
+            cur = con.execute("INSERT INTO products(name,url,enabled) VALUES (?,?,1)", (PRODUCT_NAME, PRODUCT_URL))
+            base_id = cur.lastrowid
+            # migra la memoria de 1 sola fila y los checks viejos al producto base
+            old = con.execute("SELECT last_status,last_change_ts,last_check_ts FROM status_memory WHERE id=1").fetchone()
+            if old:
+                con.execute("INSERT OR IGNORE INTO product_memory(product_id,last_status,last_change_ts,last_check_ts) VALUES (?,?,?,?)",
+                            (base_id, *old))
+            con.execute("UPDATE checks SET product_id=? WHERE product_id IS NULL", (base_id,))
+
+        _migrate(con)
+
+# ---------- Migraciones (PRAGMA user_version) ----------
+SCHEMA_VERSION = 8
+_SP_OFFSET = 3 * 3600  # los ts de texto viejos estaban en hora São Paulo (UTC-3)
 
-def log_check(ts: str, mode: str, available: int, latency_ms: int, error: str | None = None):
-    with _conn() as con:
-        con.execute(
-            "INSERT INTO checks(ts,mode,available,latency_ms,error) VALUES (?,?,?,?,?)",
-            (ts, mode, int(available), int(latency_ms), error)
+def _migrate_v2(con):
+    # checks: ts TEXT (hora SP) -> ts INTEGER (epoch UTC) + índice (product_id, ts)
+    con.execute("ALTER TABLE checks RENAME TO checks_v1")
+    con.execute("""
+    CREATE TABLE checks(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER,
+        ts INTEGER NOT NULL,        -- epoch UTC (segundos)
+        mode TEXT NOT NULL,         -- PEAK / NORMAL / MANUAL
+        available INTEGER NOT NULL, -- 0/1
+        latency_ms INTEGER NOT NULL,
+        error TEXT
+    )""")
+    con.execute("""
+        INSERT INTO checks(id,product_id,ts,mode,available,latency_ms,error)
+        SELECT id, product_id, CAST(strftime('%s', ts) AS INTEGER) + ?, mode, available, latency_ms, error
+        FROM checks_v1 WHERE strftime('%s', ts) IS NOT NULL
+    """, (_SP_OFFSET,))
+    con.execute("DROP TABLE checks_v1")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_checks_product_ts ON checks(product_id, ts)")
+
+    # rollup por producto y hora (UTC), mantenido en cada insert
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS checks_hourly(
+        product_id INTEGER,
+        hour INTEGER NOT NULL,          -- epoch UTC truncado a la hora
+        n INTEGER NOT NULL DEFAULT 0,
+        errors INTEGER NOT NULL DEFAULT 0,
+        latency_sum INTEGER NOT NULL DEFAULT 0,
+        latency_max INTEGER NOT NULL DEFAULT 0,
+        ok_n INTEGER NOT NULL DEFAULT 0,            -- checks sin error
+        ok_latency_sum INTEGER NOT NULL DEFAULT 0,
+        transitions INTEGER NOT NULL DEFAULT 0,     -- 🔴 -> 🟢
+        PRIMARY KEY (product_id, hour)
+    )""")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_checks_hourly_hour ON checks_hourly(hour)")
+    con.execute("""
+        WITH ordered AS (
+          SELECT product_id, ts, available, latency_ms, error,
+                 LAG(available) OVER (PARTITION BY product_id, error IS NULL ORDER BY ts) AS prev
+          FROM checks
         )
-        con.commit()
+        INSERT INTO checks_hourly(product_id,hour,n,errors,latency_sum,latency_max,ok_n,ok_latency_sum,transitions)
+        SELECT product_id, ts - ts % 3600,
+               COUNT(*),
+               SUM(error IS NOT NULL),
+               SUM(latency_ms),
+               MAX(latency_ms),
+               SUM(error IS NULL),
+               SUM(CASE WHEN error IS NULL THEN latency_ms ELSE 0 END),
+               SUM(error IS NULL AND available=1 AND prev=0)
+        FROM ordered
+        GROUP BY product_id, ts - ts % 3600
+    """)
+
+def _hm_to_minutes(hm: str) -> int:
+    h, m = hm.split(":")
+    return int(h) * 60 + int(m)
+
+def _quiet_ranges(silent_enabled: bool, start: int, end: int) -> tuple[int, int, int, int]:
+    """Ventana de silencio en 2 tramos [a) [b) sin cruzar medianoche; (0,0) = tramo vacío."""
+    if not silent_enabled or start == end:
+        return 0, 0, 0, 0
+    if start < end:
+        return start, end, 0, 0
+    return start, 1440, 0, end
+
+def _migrate_v3(con):
+    # suscripciones por usuario (antes: 1 CHAT_ID + flags globales en state.json)
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS subscribers(
+        chat_id INTEGER PRIMARY KEY,
+        all_products INTEGER NOT NULL DEFAULT 1,   -- sigue productos nuevos automáticamente
+        peak_enabled INTEGER NOT NULL DEFAULT 0,
+        silent_enabled INTEGER NOT NULL DEFAULT 0,
+        silent_start INTEGER NOT NULL,             -- minuto del día (SP)
+        silent_end INTEGER NOT NULL,
+        qa_start INTEGER NOT NULL DEFAULT 0,       -- ventana normalizada (ver _quiet_ranges)
+        qa_end INTEGER NOT NULL DEFAULT 0,
+        qb_start INTEGER NOT NULL DEFAULT 0,
+        qb_end INTEGER NOT NULL DEFAULT 0
+    )""")
+    # PK (product_id, chat_id) = índice para "quién sigue el producto X"
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS subscriptions(
+        product_id INTEGER NOT NULL,
+        chat_id INTEGER NOT NULL,
+        PRIMARY KEY (product_id, chat_id)
+    ) WITHOUT ROWID""")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_subscriptions_chat ON subscriptions(chat_id)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_subscribers_peak ON subscribers(peak_enabled) WHERE peak_enabled=1")
+
+    # semilla: CHAT_ID + premium, con los flags globales que había en state.json
+    seed = list_premium()
+    if CHAT_ID:
+        seed.append(int(CHAT_ID))
+    start_hm, end_hm = get_silent_window()
+    for chat_id in dict.fromkeys(seed):
+        _insert_subscriber(con, chat_id, peak=is_peak_enabled(), silent=is_silent_enabled(),
+                           start=_hm_to_minutes(start_hm), end=_hm_to_minutes(end_hm))
+
+def _migrate_v4(con):
+    # eventos de cambio de estado (ya con histéresis), en vez de reconstruirlos con LAG sobre checks
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS events(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,          -- restock / soldout
+        ts INTEGER NOT NULL,         -- epoch UTC
+        duration_s INTEGER,          -- cuánto duró el estado anterior (NULL si no se sabe)
+        alerted INTEGER NOT NULL DEFAULT 0
+    )""")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_events_product_ts ON events(product_id, ts)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_events_kind_ts ON events(kind, ts)")
+    # semilla desde el historial crudo que quede
+    con.execute("""
+        WITH ordered AS (
+          SELECT product_id, ts, available,
+                 LAG(available) OVER (PARTITION BY product_id ORDER BY ts) AS prev
+          FROM checks WHERE error IS NULL
+        )
+        INSERT INTO events(product_id,kind,ts,duration_s,alerted)
+        SELECT product_id, CASE WHEN available=1 THEN 'restock' ELSE 'soldout' END, ts, NULL, 0
+        FROM ordered
+        WHERE prev IS NOT NULL AND prev != available AND product_id IS NOT NULL
+    """)
+
+def _migrate_v5(con):
+    # modo cluster: workers vivos (heartbeat), lease del líder y contadores de generación
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS cluster_workers(
+        worker_id TEXT PRIMARY KEY,
+        host TEXT NOT NULL,
+        pid INTEGER NOT NULL,
+        started REAL NOT NULL,
+        heartbeat REAL NOT NULL     -- epoch (time.time())
+    ) WITHOUT ROWID""")
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS cluster_leader(
+        id INTEGER PRIMARY KEY CHECK (id=1),
+        worker_id TEXT,
+        expires REAL NOT NULL DEFAULT 0
+    )""")
+    con.execute("INSERT OR IGNORE INTO cluster_leader(id, worker_id, expires) VALUES (1, NULL, 0)")
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS cluster_meta(
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""")
+
+def _migrate_v6(con):
+    # salida (directa / proxy / IP local) que atendió cada chequeo
+    if "egress" not in _columns(con, "checks"):
+        con.execute("ALTER TABLE checks ADD COLUMN egress TEXT")
+
+def _migrate_v7(con):
+    # estado del proceso para arranque en caliente (validadores HTTP, scheduler, recordatorios pendientes)
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS runtime_state(
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,        -- JSON
+        updated REAL NOT NULL       -- epoch
+    ) WITHOUT ROWID""")
+
+def _migrate_v8(con):
+    # checks_hourly.transitions ya no se lee (los cambios salen de events) y era por proceso:
+    # se deja de mantener. DROP COLUMN necesita SQLite 3.35+; antes queda en 0 (DEFAULT) sin uso
+    if "transitions" in _columns(con, "checks_hourly") and sqlite3.sqlite_version_info >= (3, 35):
+        con.execute("ALTER TABLE checks_hourly DROP COLUMN transitions")
+
+_MIGRATIONS = {2: _migrate_v2, 3: _migrate_v3, 4: _migrate_v4, 5: _migrate_v5, 6: _migrate_v6, 7: _migrate_v7,
+               8: _migrate_v8}
+
+def _migrate(con):
+    version = con.execute("PRAGMA user_version").fetchone()[0]
+    for target in range(max(version, 1) + 1, SCHEMA_VERSION + 1):
+        _MIGRATIONS[target](con)
+        con.execute(f"PRAGMA user_version={target}")
+
+# ---------- Productos ----------
+def list_products(enabled_only: bool = False):
+    sql = "SELECT id,name,url,enabled FROM products"
+    if enabled_only:
+        sql += " WHERE enabled=1"
+    with _read() as con:
+        return con.execute(sql + " ORDER BY id").fetchall()  # [(id, name, url, enabled)]
+
+def get_product(product_id: int):
+    with _read() as con:
+        return con.execute("SELECT id,name,url,enabled FROM products WHERE id=?", (int(product_id),)).fetchone()
+
+def add_product(name: str, url: str) -> int | None:
+    """Devuelve el id nuevo, o None si la URL ya existía."""
+    try:
+        with _write() as con:
+            cur = con.execute("INSERT INTO products(name,url,enabled) VALUES (?,?,1)", (name, url))
+            con.execute("INSERT OR IGNORE INTO subscriptions(product_id,chat_id) "
+                        "SELECT ?, chat_id FROM subscribers WHERE all_products=1", (cur.lastrowid,))
+    except sqlite3.IntegrityError:
+        return None
+    _subscriptions_changed()
+    return cur.lastrowid
+
+def remove_product(product_id: int) -> bool:
+    with _write() as con:
+        cur = con.execute("DELETE FROM products WHERE id=?", (int(product_id),))
+        con.execute("DELETE FROM product_memory WHERE product_id=?", (int(product_id),))
+        con.execute("DELETE FROM subscriptions WHERE product_id=?", (int(product_id),))
+    _subscriptions_changed()
+    return cur.rowcount > 0
+
+def set_product_enabled(product_id: int, enabled: bool) -> bool:
+    with _write() as con:
+        cur = con.execute("UPDATE products SET enabled=? WHERE id=?", (int(bool(enabled)), int(product_id)))
+        return cur.rowcount > 0
+
+# ---------- Suscripciones por usuario ----------
+# Caches en memoria: preferencias por chat y audiencia por (producto, minuto del día)
+_prefs_cache: dict[int, dict | None] = {}
+_audience_cache: dict[tuple[int, int], list[tuple[int, bool]]] = {}
+_audience_minute: int | None = None
+
+_shared = False  # True en modo cluster: avisar a los otros procesos de cada cambio
+
+def _subscriptions_changed(chat_id: int | None = None):
+    _audience_cache.clear()
+    if chat_id is not None:
+        _prefs_cache.pop(int(chat_id), None)
+    if _shared:
+        with _write() as con:
+            con.execute("""INSERT INTO cluster_meta(key, value) VALUES ('subscriptions', 1)
+                           ON CONFLICT(key) DO UPDATE SET value = value + 1""")
+
+def share_subscription_changes(enabled: bool = True):
+    global _shared
+    _shared = enabled
+
+def invalidate_subscriptions():
+    """Otro proceso cambió suscripciones/preferencias: vaciar cachés locales."""
+    _audience_cache.clear()
+    _prefs_cache.clear()
+
+def _insert_subscriber(con, chat_id: int, peak: bool = False, silent: bool = False,
+                       start: int | None = None, end: int | None = None) -> bool:
+    if start is None or end is None:
+        # ventana por defecto: la de state.json
+        start_hm, end_hm = get_silent_window()
+        start, end = _hm_to_minutes(start_hm), _hm_to_minutes(end_hm)
+    cur = con.execute("""
+        INSERT OR IGNORE INTO subscribers(chat_id,all_products,peak_enabled,silent_enabled,silent_start,silent_end,
+                                          qa_start,qa_end,qb_start,qb_end)
+        VALUES (?,1,?,?,?,?,?,?,?,?)
+    """, (int(chat_id), int(peak), int(silent), start, end, *_quiet_ranges(silent, start, end)))
+    if cur.rowcount:
+        con.execute("INSERT OR IGNORE INTO subscriptions(product_id,chat_id) SELECT id, ? FROM products",
+                    (int(chat_id),))
+    return cur.rowcount > 0
+
+def subscribe(chat_id: int) -> bool:
+    """Alta con todos los productos. True si es nuevo."""
+    with _write() as con:
+        new = _insert_subscriber(con, chat_id)
+    _subscriptions_changed(chat_id)
+    return new
+
+def unsubscribe(chat_id: int) -> bool:
+    with _write() as con:
+        cur = con.execute("DELETE FROM subscribers WHERE chat_id=?", (int(chat_id),))
+        con.execute("DELETE FROM subscriptions WHERE chat_id=?", (int(chat_id),))
+    _subscriptions_changed(chat_id)
+    return cur.rowcount > 0
+
+def follow_product(chat_id: int, product_id: int, follow: bool = True) -> bool:
+    with _write() as con:
+        _insert_subscriber(con, chat_id)
+        if con.execute("SELECT 1 FROM products WHERE id=?", (int(product_id),)).fetchone() is None:
+            return False
+        if follow:
+            con.execute("INSERT OR IGNORE INTO subscriptions(product_id,chat_id) VALUES (?,?)",
+                        (int(product_id), int(chat_id)))
+        else:
+            con.execute("DELETE FROM subscriptions WHERE product_id=? AND chat_id=?", (int(product_id), int(chat_id)))
+            con.execute("UPDATE subscribers SET all_products=0 WHERE chat_id=?", (int(chat_id),))
+    _subscriptions_changed(chat_id)
+    return True
+
+def get_prefs(chat_id: int) -> dict | None:
+    """Preferencias del chat (cacheadas). None si no está suscrito."""
+    chat_id = int(chat_id)
+    if chat_id in _prefs_cache:
+        return _prefs_cache[chat_id]
+    with _read() as con:
+        row = con.execute(
+            "SELECT peak_enabled,silent_enabled,silent_start,silent_end FROM subscribers WHERE chat_id=?",
+            (chat_id,)
+        ).fetchone()
+    prefs = None
+    if row:
+        prefs = {"peak": bool(row[0]), "silent": bool(row[1]), "silent_start": row[2], "silent_end": row[3]}
+    _prefs_cache[chat_id] = prefs
+    return prefs
+
+def _toggle(chat_id: int, column: str) -> bool:
+    with _write() as con:
+        _insert_subscriber(con, chat_id)
+        con.execute(f"UPDATE subscribers SET {column}=1-{column} WHERE chat_id=?", (int(chat_id),))
+        peak, silent, start, end = con.execute(
+            "SELECT peak_enabled,silent_enabled,silent_start,silent_end FROM subscribers WHERE chat_id=?",
+            (int(chat_id),)
+        ).fetchone()
+        con.execute("UPDATE subscribers SET qa_start=?,qa_end=?,qb_start=?,qb_end=? WHERE chat_id=?",
+                    (*_quiet_ranges(bool(silent), start, end), int(chat_id)))
+    _subscriptions_changed(chat_id)
+    return bool(peak if column == "peak_enabled" else silent)
+
+def toggle_peak(chat_id: int) -> bool:
+    return _toggle(chat_id, "peak_enabled")
+
+def toggle_silent(chat_id: int) -> bool:
+    return _toggle(chat_id, "silent_enabled")
+
+def peak_subscribers() -> list[int]:
+    with _read() as con:
+        return [r[0] for r in con.execute("SELECT chat_id FROM subscribers WHERE peak_enabled=1")]
+
+def product_audience(product_id: int, minute: int) -> list[tuple[int, bool]]:
+    """
+    [(chat_id, silenciado)] de quienes siguen el producto, para el minuto del día (SP) dado.
+    1 query indexada por producto; el resultado se cachea para ese minuto.
+    """
+    global _audience_minute
+    if minute != _audience_minute:
+        _audience_cache.clear()
+        _audience_minute = minute
+    key = (int(product_id), minute)
+    if key not in _audience_cache:
+        with _read() as con:
+            _audience_cache[key] = [(chat_id, bool(silenced)) for chat_id, silenced in con.execute("""
+                SELECT s.chat_id,
+                       (u.qa_start <= :m AND :m < u.qa_end) OR (u.qb_start <= :m AND :m < u.qb_end)
+                FROM subscriptions s JOIN subscribers u ON u.chat_id = s.chat_id
+                WHERE s.product_id = :p
+            """, {"p": int(product_id), "m": int(minute)})]
+    return _audience_cache[key]
+
+# ---------- Memoria por producto ----------
+def get_memory(product_id: int):
+    with _read() as con:
+        row = con.execute("SELECT last_status,last_change_ts,last_check_ts FROM product_memory WHERE product_id=?",
+                          (int(product_id),)).fetchone()
+        return row or (None, None, None)  # (status int/None, change_ts, check_ts)
+
+def _op_update_memory(con, product_id: int, new_status: int, check_ts: str):
+    old = con.execute("SELECT last_status,last_change_ts FROM product_memory WHERE product_id=?",
+                      (int(product_id),)).fetchone()
+    old_status = old[0] if old else None
+
+    # if first time or changed -> set new change_ts
+    if old_status is None or int(old_status) != int(new_status):
+        con.execute("""
+            INSERT INTO product_memory(product_id,last_status,last_change_ts,last_check_ts) VALUES (?,?,?,?)
+            ON CONFLICT(product_id) DO UPDATE SET
+              last_status=excluded.last_status,
+              last_change_ts=excluded.last_change_ts,
+              last_check_ts=excluded.last_check_ts
+        """, (int(product_id), int(new_status), check_ts, check_ts))
+    else:
+        con.execute("UPDATE product_memory SET last_check_ts=? WHERE product_id=?", (check_ts, int(product_id)))
+
+def _op_log_check(con, ts: int, mode: str, available: int, latency_ms: int, error: str | None,
+                  product_id: int | None, egress: str | None = None):
+    con.execute(
+        "INSERT INTO checks(ts,mode,available,latency_ms,error,product_id,egress) VALUES (?,?,?,?,?,?,?)",
+        (ts, mode, int(available), int(latency_ms), error, product_id, egress)
+    )
+
+    ok = int(error is None)
+    con.execute("""
+        INSERT INTO checks_hourly(product_id,hour,n,errors,latency_sum,latency_max,ok_n,ok_latency_sum)
+        VALUES (?,?,1,?,?,?,?,?)
+        ON CONFLICT(product_id,hour) DO UPDATE SET
+          n=n+1,
+          errors=errors+excluded.errors,
+          latency_sum=latency_sum+excluded.latency_sum,
+          latency_max=MAX(latency_max, excluded.latency_max),
+          ok_n=ok_n+excluded.ok_n,
+          ok_latency_sum=ok_latency_sum+excluded.ok_latency_sum
+    """, (product_id, ts - ts % 3600, 1 - ok, int(latency_ms), int(latency_ms), ok, int(latency_ms) * ok))
+
+def _op_log_event(con, product_id: int, kind: str, ts: int, duration_s: int | None, alerted: bool):
+    con.execute("INSERT INTO events(product_id,kind,ts,duration_s,alerted) VALUES (?,?,?,?,?)",
+                (int(product_id), kind, int(ts), duration_s, int(alerted)))
+
+def log_event(product_id: int, kind: str, ts: int, duration_s: int | None = None, alerted: bool = False):
+    _submit(_op_log_event, (product_id, kind, ts, duration_s, alerted))
+
+def event_seed():
+    """Por producto: (product_id, last_status, ts último evento, ts último restock avisado)."""
+    with _read() as con:
+        return con.execute("""
+            SELECT p.id,
+                   m.last_status,
+                   (SELECT MAX(ts) FROM events e WHERE e.product_id = p.id),
+                   (SELECT MAX(ts) FROM events e WHERE e.product_id = p.id AND e.kind = 'restock' AND e.alerted = 1)
+            FROM products p LEFT JOIN product_memory m ON m.product_id = p.id
+        """).fetchall()
+
+def _op_put_state(con, key: str, value: str, updated: float):
+    con.execute("""INSERT INTO runtime_state(key, value, updated) VALUES (?,?,?)
+                   ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated=excluded.updated""",
+                (key, value, updated))
+
+def save_state(key: str, value):
+    """Guarda un valor JSON (write-behind)."""
+    _submit(_op_put_state, (key, json.dumps(value), time.time()))
+
+def load_state() -> dict:
+    """{key: (valor, epoch de guardado)} de todo el runtime_state."""
+    with _read() as con:
+        return {key: (json.loads(value), updated)
+                for key, value, updated in con.execute("SELECT key, value, updated FROM runtime_state")}
+
+def update_memory(product_id: int, new_status: int, check_ts: str):
+    _submit(_op_update_memory, (product_id, new_status, check_ts))
+
+def log_check(mode: str, available: int, latency_ms: int, error: str | None = None,
+              product_id: int | None = None, ts: int | None = None, egress: str | None = None):
+    """ts = epoch UTC (por defecto: ahora). egress = salida que atendió el request."""
+    ts = int(time.time()) if ts is None else int(ts)
+    _submit(_op_log_check, (ts, mode, available, latency_ms, error, product_id, egress))
+
+# ---------- Write-behind ----------
+def _apply(ops):
+    # 1 sola transacción por lote
+    with db_write_seconds.time(), _write() as con:
+        for op, args in ops:
+            op(con, *args)
+
+def _submit(op, args):
+    """Encola la escritura si el writer async está activo; si no, escribe directo."""
+    if _write_queue is None:
+        _apply([(op, args)])
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is _loop:
+        _write_queue.put_nowait((op, args))
+    else:
+        _loop.call_soon_threadsafe(_write_queue.put_nowait, (op, args))
+
+async def _writer_loop():
+    # None en la cola = apagar (después de guardar lo pendiente)
+    running = True
+    while running:
+        item = await _write_queue.get()
+        if item is None:
+            break
+        batch = [item]
+        # junta lo que llegue durante la ventana de flush (hasta STORE_BATCH_MAX)
+        deadline = _loop.time() + STORE_FLUSH_SECONDS
+        while len(batch) < STORE_BATCH_MAX:
+            timeout = deadline - _loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(_write_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                running = False
+                break
+            batch.append(item)
+        try:
+            await asyncio.to_thread(_apply, batch)
+        except Exception as e:
+            print(f"⚠️ DB: no se pudo guardar lote de {len(batch)}: {e}")
+
+async def start_writer():
+    global _write_queue, _writer_task, _loop
+    if _writer_task is not None:
+        return
+    _loop = asyncio.get_running_loop()
+    _write_queue = asyncio.Queue()
+    _writer_task = asyncio.create_task(_writer_loop())
+
+async def stop_writer():
+    """Guarda lo pendiente y apaga el writer (post_shutdown)."""
+    global _write_queue, _writer_task
+    if _writer_task is None:
+        return
+    _write_queue.put_nowait(None)
+    await _writer_task
+    _write_queue = None
+    _writer_task = None
+
+def _sp_hour_sql() -> str:
+    # hora local São Paulo (00-23) de un bucket UTC
+    return "printf('%02d', ((hour / 3600) + 21) % 24)"
 
 def stats_today():
-    # simple: last 24h
-    with _conn() as con:
+    # last 24h, desde el rollup horario
+    since = int(time.time()) - 24 * 3600
+    with _read() as con:
         rows = con.execute("""
             SELECT
-              COUNT(*),
-              SUM(CASE WHEN error IS NOT NULL THEN 1 ELSE 0 END),
-              AVG(latency_ms),
-              MAX(latency_ms)
-            FROM checks
-            WHERE ts >= datetime('now','-24 hours')
-        """).fetchone()
+              COALESCE(SUM(n), 0),
+              COALESCE(SUM(errors), 0),
+              SUM(latency_sum) * 1.0 / NULLIF(SUM(n), 0),
+              MAX(latency_max)
+            FROM checks_hourly
+            WHERE hour >= ?
+        """, (since - since % 3600,)).fetchone()
         return rows  # total, errors, avg_ms, max_ms
 
 def peak_hours_by_latency(limit=5):
-    # top hours (0-23) by avg latency in last 7 days
-    with _conn() as con:
-        rows = con.execute("""
-            SELECT substr(ts,12,2) AS hour,
-                   COUNT(*) AS n,
-                   AVG(latency_ms) AS avg_ms
-            FROM checks
-            WHERE ts >= datetime('now','-7 days') AND error IS NULL
-            GROUP BY hour
+    # top hours (0-23, SP) by avg latency in last 7 days
+    since = int(time.time()) - 7 * 24 * 3600
+    with _read() as con:
+        rows = con.execute(f"""
+            SELECT {_sp_hour_sql()} AS sp_hour,
+                   SUM(ok_n) AS n,
+                   SUM(ok_latency_sum) * 1.0 / SUM(ok_n) AS avg_ms
+            FROM checks_hourly
+            WHERE hour >= ?
+            GROUP BY sp_hour
             HAVING n >= 5
             ORDER BY avg_ms DESC
             LIMIT ?
-        """, (limit,)).fetchall()
+        """, (since, limit)).fetchall()
         return rows
 
 def peak_hours_by_changes(limit=5):
-    # hours with most "became available" transitions in last 30 days (based on memory changes)
-    # We'll approximate: count checks where available=1 and previous check was 0.
-    with _conn() as con:
+    # hours (SP) with most restock events in last 30 days
+    since = int(time.time()) - 30 * 24 * 3600
+    with _read() as con:
         rows = con.execute("""
-            WITH ordered AS (
-              SELECT ts, available,
-                     LAG(available) OVER (ORDER BY ts) AS prev
-              FROM checks
-              WHERE ts >= datetime('now','-30 days') AND error IS NULL
-            )
-            SELECT substr(ts,12,2) AS hour,
+            SELECT strftime('%H', ts - ?, 'unixepoch') AS sp_hour,
                    COUNT(*) AS hits
-            FROM ordered
-            WHERE available=1 AND (prev=0 OR prev IS NULL)
-            GROUP BY hour
+            FROM events
+            WHERE kind = 'restock' AND ts >= ?
+            GROUP BY sp_hour
             ORDER BY hits DESC
             LIMIT ?
-        """, (limit,)).fetchall()
-        return rows
\ No newline at end of file
+        """, (_SP_OFFSET, since, limit)).fetchall()
+        return rows
+
+def recent_health(hours: int = 2):
+    # salud reciente (todas las URLs): n, errores, latencia promedio
+    since = int(time.time()) - hours * 3600
+    with _read() as con:
+        return con.execute("""
+            SELECT COALESCE(SUM(n), 0),
+                   COALESCE(SUM(errors), 0),
+                   SUM(latency_sum) * 1.0 / NULLIF(SUM(n), 0)
+            FROM checks_hourly
+            WHERE hour >= ?
+        """, (since - since % 3600,)).fetchone()  # n, errors, avg_ms
+
+# ---------- Cluster (varios procesos sobre la misma DB) ----------
+def cluster_beat(worker_id: str, host: str, pid: int, started: float, ttl: float, want_leader: bool):
+    """
+    1 transacción por heartbeat: renueva mi fila, toma/renueva el lease de líder si está libre
+    y devuelve (workers vivos, id del líder, generación de suscripciones).
+    """
+    now = time.time()
+    with _write() as con:
+        con.execute("""INSERT INTO cluster_workers(worker_id, host, pid, started, heartbeat) VALUES (?,?,?,?,?)
+                       ON CONFLICT(worker_id) DO UPDATE SET heartbeat=excluded.heartbeat""",
+                    (worker_id, host, pid, started, now))
+        # filas de procesos muertos hace rato
+        con.execute("DELETE FROM cluster_workers WHERE heartbeat < ?", (now - ttl * 10,))
+        if want_leader:
+            con.execute("UPDATE cluster_leader SET worker_id=?, expires=? "
+                        "WHERE id=1 AND (worker_id=? OR worker_id IS NULL OR expires < ?)",
+                        (worker_id, now + ttl, worker_id, now))
+        members = [r[0] for r in con.execute(
+            "SELECT worker_id FROM cluster_workers WHERE heartbeat >= ? ORDER BY worker_id", (now - ttl,))]
+        leader = con.execute("SELECT worker_id FROM cluster_leader WHERE id=1 AND expires >= ?", (now,)).fetchone()
+        gen = con.execute("SELECT value FROM cluster_meta WHERE key='subscriptions'").fetchone()
+    return members, leader[0] if leader else None, gen[0] if gen else 0
+
+def cluster_leave(worker_id: str):
+    """Apagado ordenado: sale del anillo y suelta el lease (los demás lo ven al toque)."""
+    with _write() as con:
+        con.execute("DELETE FROM cluster_workers WHERE worker_id=?", (worker_id,))
+        con.execute("UPDATE cluster_leader SET worker_id=NULL, expires=0 WHERE id=1 AND worker_id=?", (worker_id,))
+
+def cluster_members():
+    with _read() as con:
+        return con.execute("SELECT worker_id, host, pid, started, heartbeat FROM cluster_workers "
+                           "ORDER BY worker_id").fetchall()
+
+# ---------- Mantenimiento (retención / compactación) ----------
+def purge_checks_before(cutoff_ts: int, batch: int) -> int:
+    """Borra hasta `batch` checks crudos con ts < cutoff (ya están resumidos en checks_hourly)."""
+    with _write() as con:
+        cur = con.execute(
+            "DELETE FROM checks WHERE id IN (SELECT id FROM checks WHERE ts < ? ORDER BY id LIMIT ?)",
+            (int(cutoff_ts), int(batch))
+        )
+        return cur.rowcount
+
+def purge_rollups_before(cutoff_ts: int, batch: int) -> int:
+    with _write() as con:
+        cur = con.execute(
+            "DELETE FROM checks_hourly WHERE rowid IN (SELECT rowid FROM checks_hourly WHERE hour < ? LIMIT ?)",
+            (int(cutoff_ts), int(batch))
+        )
+        return cur.rowcount
+
+def compact_db(pages: int):
+    """
+    Devuelve hasta `pages` páginas libres al disco y hace un checkpoint PASSIVE del WAL.
+    Trabajo acotado: nunca un VACUUM completo ni un checkpoint que espere a los lectores,
+    así el writer (write-behind, heartbeats del cluster) no queda bloqueado.
+    """
+    with _write() as con:
+        if con.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            con.execute(f"PRAGMA incremental_vacuum({int(pages)})")
+    with _read() as con:
+        con.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+def enable_incremental_vacuum() -> bool:
+    """
+    Paso offline (python main.py --vacuum, con el bot apagado): pasa una DB vieja a
+    auto_vacuum=INCREMENTAL con un VACUUM completo. Devuelve False si ya estaba.
+    """
+    with _write() as con:
+        if con.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        con.commit()
+        con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        con.execute("VACUUM")
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return True
+
+def db_report() -> dict:
+    def size(path: str) -> int:
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    with _read() as con:
+        counts = {
+            table: con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("checks", "checks_hourly", "products", "product_memory", "events")
+        }
+        oldest = con.execute("SELECT MIN(ts) FROM checks").fetchone()[0]
+        free_pages = con.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = con.execute("PRAGMA auto_vacuum").fetchone()[0]
+    return {
+        "db_bytes": size(DB_PATH),
+        "wal_bytes": size(DB_PATH + "-wal"),
+        "free_pages": free_pages,
+        "incremental_vacuum": auto_vacuum == 2,
+        "oldest_check_ts": oldest,
+        "rows": counts,
+    }
@@ -0,0 +1,98 @@
+# core/warmstart.py
+import time
+
+from config import CLUSTER, WARM_START_DELAY, WARM_ALERT_MAX_LATE, WARM_STATE_MAX_AGE
+from core.dispatcher import get_dispatcher
+from core.metrics import gauge
+from core.store import save_state, load_state
+from core.weverse import snapshot_validators, restore_validators
+
+# Tiempos de arranque (perf_counter): inicio del proceso, bot listo, primer chequeo terminado
+_boot = {"t0": None, "ready": None, "first_check": None}
+_pending_restore: list[dict] = []
+
+
+def _since_boot(key: str) -> float | None:
+    if _boot["t0"] is None or _boot[key] is None:
+        return None
+    return _boot[key] - _boot["t0"]
+
+
+gauge("startup_ready_seconds", "Del inicio del proceso al bot listo", lambda: _since_boot("ready") or 0)
+gauge("startup_first_check_seconds", "Del inicio del proceso al primer chequeo terminado",
+      lambda: _since_boot("first_check") or 0)
+
+
+def mark_boot(t0: float):
+    _boot["t0"] = t0
+
+
+def mark_ready():
+    _boot["ready"] = time.perf_counter()
+    ready = _since_boot("ready")
+    if ready is not None:
+        print(f"⚡ Bot listo en {ready * 1000:.0f} ms")
+
+
+def mark_first_check():
+    if _boot["first_check"] is not None:
+        return
+    _boot["first_check"] = time.perf_counter()
+    first = _since_boot("first_check")
+    if first is not None:
+        print(f"⚡ Primer chequeo completo a los {first * 1000:.0f} ms del arranque")
+
+
+def startup_report() -> str:
+    ready, first = _since_boot("ready"), _since_boot("first_check")
+    fmt = lambda s: f"{s * 1000:.0f}ms" if s is not None else "—"  # noqa: E731
+    return f"listo {fmt(ready)} · 1er chequeo {fmt(first)}"
+
+
+def restore() -> dict:
+    """
+    Lee el estado guardado (sync, después de init_db):
+    validadores HTTP (304 desde el primer chequeo), posición del scheduler y recordatorios pendientes.
+    Devuelve {"first_delay", "mode", "delay"}; el primer chequeo nunca tarda más de WARM_START_DELAY.
+    """
+    state = load_state()
+    now = time.time()
+    fresh = {k: v for k, (v, updated) in state.items() if now - updated <= WARM_STATE_MAX_AGE}
+
+    restore_validators(fresh.get("validators") or {})
+    if not CLUSTER:
+        # en cluster otro worker puede tener los mismos recordatorios: no duplicar
+        _pending_restore.extend(fresh.get("pending_alerts") or [])
+
+    sched = fresh.get("scheduler") or {}
+    remaining = max(0.0, sched.get("due", now) - now)
+    first_delay = min(remaining, WARM_START_DELAY)
+    if fresh:
+        print(f"♻️ Arranque en caliente: {len(fresh.get('validators') or {})} URLs, "
+              f"{len(_pending_restore)} recordatorios, primer chequeo en {first_delay:.1f}s")
+    return {"first_delay": first_delay, "mode": sched.get("mode"), "delay": sched.get("delay")}
+
+
+def restore_pending_alerts() -> int:
+    """Re-agenda recordatorios guardados (después de init_dispatcher)."""
+    dispatcher = get_dispatcher()
+    if dispatcher is None or not _pending_restore:
+        return 0
+    restored = dispatcher.restore(_pending_restore, WARM_ALERT_MAX_LATE)
+    _pending_restore.clear()
+    return restored
+
+
+def save(mode: str | None, delay: float | None):
+    """Snapshot tras cada tick del monitor (write-behind: no frena el loop)."""
+    save_state("validators", snapshot_validators())
+    save_state("scheduler", {"mode": mode, "delay": delay, "due": time.time() + (delay or 0)})
+    dispatcher = get_dispatcher()
+    if dispatcher is not None and not CLUSTER:
+        save_state("pending_alerts", dispatcher.snapshot())
+
+
+def save_pending(leftover: list[dict]):
+    """Al apagar: lo que el dispatcher no llegó a mandar."""
+    if not CLUSTER:
+        save_state("pending_alerts", leftover)
@@ -0,0 +1,57 @@
+# core/webhook.py
+from config import (
+    WEBHOOK_URL, WEBHOOK_SECRET, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_DROP_PENDING,
+    ALLOWED_UPDATES,
+)
+from core.httpserver import HttpServer, json_response, text_response
+from core.metrics import render as render_metrics
+
+
+def add_metrics_route(server: HttpServer):
+    async def metrics(request):
+        return text_response(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    server.route("GET", "/metrics", metrics)
+
+
+def add_health_route(server: HttpServer, app):
+    async def health(request):
+        return json_response({
+            "ok": app.running,
+            "mode": "webhook" if WEBHOOK_URL else "polling",
+            "pending_updates": app.update_queue.qsize(),
+        }, status=200 if app.running else 503)
+
+    server.route("GET", "/healthz", health)
+
+
+async def start_metrics_server(host: str, port: int, app) -> HttpServer | None:
+    """Servidor de /metrics y /healthz. Si el puerto está ocupado, seguimos sin él."""
+    server = HttpServer(host, port)
+    add_metrics_route(server)
+    add_health_route(server, app)
+    try:
+        await server.start()
+    except OSError as e:
+        print(f"⚠️ No se pudo abrir /metrics en {host}:{port}: {e}")
+        return None
+    print(f"📈 Métricas en http://{host}:{server.port}/metrics (health: /healthz)")
+    return server
+
+
+def run_webhook(app):
+    """
+    Alternativa a run_polling: Telegram empuja los updates al servidor webhook de PTB
+    (valida el secret_token, registra el webhook y se apaga ordenado con SIGINT/SIGTERM).
+    Varias instancias pueden ir detrás de un balanceador (todas con el mismo secret).
+    """
+    print(f"🌐 Webhook en {WEBHOOK_LISTEN}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+    app.run_webhook(
+        listen=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        url_path=WEBHOOK_PATH.lstrip("/"),
+        webhook_url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=ALLOWED_UPDATES,
+        drop_pending_updates=WEBHOOK_DROP_PENDING,
+    )
@@ -1,18 +1,229 @@
 # core/weverse.py
-import requests
-from config import USER_AGENT, PRODUCT_URL
-
-def fetch_page() -> str:
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept-Language": "en-US,en;q=0.9,pt-BR;q=0.8,es;q=0.7",
-        "Cache-Control": "no-cache",
-        "Pragma": "no-cache",
-    }
-    r = requests.get(PRODUCT_URL, headers=headers, timeout=25)
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, replace
+
+import httpx
+from config import PRODUCT_URL, RESULT_CACHE_TTL
+from core.extractor import embedded_json, embedded_options
+from core.metrics import phase_seconds, gauge
+from core.resilience import parse_retry_after, RETRYABLE_STATUS
+from core.egress import EgressPool, init_pool, get_pool, close_pool
+
+# Validadores por URL para GET condicional:
+# url -> {"etag", "last_modified", "digest", "available", "options", "structured"}
+_validators: dict[str, dict] = {}
+
+# Caché de resultados compartida (monitor + /check) y requests en vuelo por URL
+_results: dict[str, tuple[float, "CheckResult"]] = {}
+_inflight: dict[str, asyncio.Task] = {}
+cache_stats = {"hits": 0, "misses": 0, "coalesced": 0}
+gauge("weverse_inflight_requests", "Requests a Weverse en vuelo", lambda: len(_inflight))
+
+async def init_client(egresses=None) -> EgressPool:
+    """Crea el pool de salidas (cada una con su cliente HTTP); se llama en post_init."""
+    return init_pool(egresses)
+
+
+async def close_client():
+    await close_pool()
+
+
+def get_client() -> httpx.AsyncClient:
+    return get_pool().default_client()
+
+
+async def fetch_page(url: str = PRODUCT_URL) -> str:
+    r = await get_client().get(url)
     r.raise_for_status()
     return r.text.lower()
 
+@dataclass
+class CheckResult:
+    available: bool
+    cached: bool = False  # True si se reutilizó el veredicto anterior (304 o mismo contenido)
+    options: dict[str, bool] | None = None  # stock por opción (si la página trae JSON)
+    egress: str | None = None  # salida (directa / proxy / IP) que atendió el request
+    shared: bool = False  # True si vino de la caché o del request en vuelo de otro (no hubo fetch propio)
+
+    def options_in_stock(self) -> list[str]:
+        return [name for name, ok in (self.options or {}).items() if ok]
+
+
+class _PhaseTrace:
+    """
+    Callback de trace de httpcore: marca cuándo termina la conexión (TCP+TLS)
+    y cuándo llegan los headers, para separar connect / TTFB / body.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.connect_start = None
+        self.connected = None
+        self.headers = None
+
+    async def __call__(self, event: str, info: dict):
+        if event == "connection.connect_tcp.started":
+            self.connect_start = time.perf_counter()
+        elif event in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            self.connected = time.perf_counter()
+        elif event.endswith("receive_response_headers.complete"):
+            self.headers = time.perf_counter()
+
+    def observe(self, parse_s: float):
+        end = time.perf_counter()
+        if self.connect_start is not None and self.connected is not None:
+            # solo hay connect si no se reutilizó una conexión del pool
+            phase_seconds.observe(self.connected - self.connect_start, phase="connect")
+        if self.headers is not None:
+            phase_seconds.observe(self.headers - (self.connected or self.start), phase="ttfb")
+            phase_seconds.observe(max(0.0, end - self.headers - parse_s), phase="body")
+        phase_seconds.observe(parse_s, phase="parse")
+
+
+def _conditional_headers(entry: dict) -> dict:
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+async def fetch_status(url: str = PRODUCT_URL, conditional: bool = True, rank: int = 0) -> CheckResult:
+    """
+    Revisa disponibilidad.
+    - GET condicional (ETag / Last-Modified): un 304 reutiliza el veredicto anterior.
+    - Si el servidor ignora los validadores, un hash (blake2b) igual al anterior también lo
+      reutiliza, sin parsear: del JSON embebido si la página lo trae, si no del cuerpo entero.
+    - Primero intenta el stock estructurado (JSON embebido, por opción); si no hay,
+      palabras clave sobre el cuerpo entero (1 pasada, corta en la primera clave que aparece).
+    conditional=False fuerza una lectura fresca (confirmación) y no toca los validadores.
+    Sale por la salida más rápida y sana del pool (rank=i: la i-ésima, para repartir sondas);
+    si el host está en pausa por todas las salidas lanza CircuitOpen sin salir a la red.
+    Los errores llevan .egress con la salida que falló.
+    """
+    egress, breaker = get_pool().acquire(url, rank)
+    started = egress.begin()
+    try:
+        result = await _fetch_status(egress.client, url, conditional)
+    except httpx.HTTPStatusError as e:
+        egress.end(started, ok=False)
+        if e.response.status_code in RETRYABLE_STATUS:
+            breaker.record_failure(parse_retry_after(e.response.headers.get("retry-after")))
+        else:
+            breaker.record_success()  # el host responde; el problema es la página
+        e.egress = egress.name
+        raise
+    except httpx.TransportError as e:  # timeouts, conexión rechazada, TLS, proxy caído…
+        egress.end(started, ok=False)
+        breaker.record_failure()
+        e.egress = egress.name
+        raise
+    except asyncio.CancelledError:
+        egress.abort()
+        breaker.release()
+        raise
+    except BaseException:
+        egress.end(started, ok=False)
+        breaker.release()
+        raise
+    egress.end(started, ok=True)
+    breaker.record_success()
+    result.egress = egress.name
+    return result
+
+
+async def _fetch_status(client: httpx.AsyncClient, url: str, conditional: bool) -> CheckResult:
+    entry = _validators.get(url, {})
+    use_validators = conditional and "available" in entry
+    headers = _conditional_headers(entry) if use_validators else None
+
+    trace = _PhaseTrace()
+    parse_s = 0.0
+    r = await client.get(url, headers=headers, extensions={"trace": trace})
+    if r.status_code == 304 and use_validators:
+        trace.observe(parse_s)
+        return CheckResult(available=entry["available"], cached=True, options=entry.get("options"))
+    r.raise_for_status()
+
+    # Lo que decide el veredicto: el __NEXT_DATA__ (si la URL ya se sabe sin JSON, ni se busca)
+    # o, si no hay, el cuerpo entero. Se hashea solo eso: el JSON es una fracción de la página.
+    t0 = time.perf_counter()
+    raw = r.content
+    payload = embedded_json(raw) if entry.get("structured") is not False else None
+    digest = None
+    if conditional:  # una lectura fresca (confirmación) no compara ni guarda el hash
+        digest = hashlib.blake2b(raw if payload is None else payload, digest_size=16).hexdigest()
+        if use_validators and entry.get("digest") == digest:
+            parse_s += time.perf_counter() - t0
+            trace.observe(parse_s)
+            return CheckResult(available=entry["available"], cached=True, options=entry.get("options"))
+
+    options = embedded_options(payload) if payload is not None else None
+    if options:
+        available = any(options.values())
+    else:
+        available = is_available(raw.decode(r.encoding or "utf-8", errors="replace").lower())
+    parse_s += time.perf_counter() - t0
+    trace.observe(parse_s)
+
+    if not conditional:
+        return CheckResult(available=available, options=options)
+
+    _validators[url] = {
+        "etag": r.headers.get("etag"),
+        "last_modified": r.headers.get("last-modified"),
+        "digest": digest,
+        "available": available,
+        "options": options,
+        "structured": options is not None,
+    }
+    return CheckResult(available=available, options=options)
+
+
+async def get_status(url: str = PRODUCT_URL, max_age: float = RESULT_CACHE_TTL) -> CheckResult:
+    """
+    Como fetch_status, pero:
+    - si hay un resultado de hace menos de `max_age` s, lo reutiliza;
+    - si ya hay un request en vuelo para esa URL, espera ese mismo (single-flight).
+    En esos 2 casos el resultado vuelve con shared=True: solo quien hizo el fetch lo registra.
+    """
+    cached = _results.get(url)
+    if cached and time.monotonic() - cached[0] <= max_age:
+        cache_stats["hits"] += 1
+        return replace(cached[1], shared=True)
+
+    task = _inflight.get(url)
+    if task is not None:
+        cache_stats["coalesced"] += 1
+        return replace(await asyncio.shield(task), shared=True)
+
+    cache_stats["misses"] += 1
+    task = asyncio.ensure_future(_fetch_and_store(url))
+    _inflight[url] = task
+    task.add_done_callback(lambda _: _inflight.pop(url, None))
+    # shield: si un /check se cancela, el request sigue para los demás
+    return await asyncio.shield(task)
+
+
+async def _fetch_and_store(url: str) -> CheckResult:
+    result = await fetch_status(url)
+    _results[url] = (time.monotonic(), result)
+    return result
+
+
+def snapshot_validators() -> dict[str, dict]:
+    """Validadores + último veredicto por URL (para arranque en caliente)."""
+    return {url: dict(entry) for url, entry in _validators.items()}
+
+
+def restore_validators(saved: dict[str, dict]):
+    for url, entry in saved.items():
+        _validators.setdefault(url, entry)
+
+
 def is_available(html: str) -> bool:
     sold_out = ["sold out", "agotado", "esgotado", "out of stock", "inventory 0", "no stock"]
     if any(k in html for k in sold_out):
@@ -23,4 +234,4 @@ def is_available(html: str) -> bool:
         return False
 
     buy = ["add to cart", "checkout", "buy now", "comprar", "adicionar ao carrinho", "finalizar compra", "장바구니"]
-    return any(k in html for k in buy)
\ No newline at end of file
+    return any(k in html for k in buy)
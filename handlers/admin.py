@@ -1,8 +1,13 @@
 # handlers/admin.py
+import asyncio
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from utils.premium import add_premium, remove_premium, list_premium
+from core.store import add_product, remove_product, set_product_enabled, db_report
+from core.events import detector
+from core.metrics import summary as metrics_summary
 from handlers.buttons import build_keyboard
 
 # 👉 CAMBIA ESTO por TU user_id (admin principal)
@@ -80,4 +85,107 @@ async def premiumlist_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     text = "💎 Usuarios PREMIUM\n━━━━━━━━━━━━━━\n"
     text += "\n".join([f"• `{i}`" for i in ids])
-    await update.message.reply_text(text, parse_mode="Markdown")
\ No newline at end of file
+    await update.message.reply_text(text, parse_mode="Markdown")
+
+# ---------- Productos (admin) ----------
+async def addproduct_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    uid = update.effective_user.id
+    if not is_admin(uid):
+        await update.message.reply_text("⛔ Solo el admin puede usar este comando.")
+        return
+
+    if len(context.args) < 2 or not context.args[0].startswith("http"):
+        await update.message.reply_text("Uso: /addproducto <url> <nombre>")
+        return
+
+    url = context.args[0]
+    name = " ".join(context.args[1:])
+    product_id = await asyncio.to_thread(add_product, name, url)
+    if product_id is None:
+        msg = "ℹ️ Esa URL ya está en la lista de productos"
+    else:
+        msg = f"📦 Producto `{product_id}` agregado ✅\n🛒 {name}"
+
+    await update.message.reply_text(msg, parse_mode="Markdown")
+
+async def delproduct_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    uid = update.effective_user.id
+    if not is_admin(uid):
+        await update.message.reply_text("⛔ Solo el admin puede usar este comando.")
+        return
+
+    if not context.args:
+        await update.message.reply_text("Uso: /delproducto <id>")
+        return
+
+    try:
+        target = int(context.args[0])
+    except ValueError:
+        await update.message.reply_text("❌ ID inválido.")
+        return
+
+    if await asyncio.to_thread(remove_product, target):
+        detector.forget(target)
+        msg = f"🗑️ Producto `{target}` eliminado"
+    else:
+        msg = f"ℹ️ No existe el producto `{target}`"
+
+    await update.message.reply_text(msg, parse_mode="Markdown")
+
+async def product_toggle_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    uid = update.effective_user.id
+    if not is_admin(uid):
+        await update.message.reply_text("⛔ Solo el admin puede usar este comando.")
+        return
+
+    if len(context.args) < 2 or context.args[1].lower() not in ("on", "off"):
+        await update.message.reply_text("Uso: /producto <id> on|off")
+        return
+
+    try:
+        target = int(context.args[0])
+    except ValueError:
+        await update.message.reply_text("❌ ID inválido.")
+        return
+
+    enabled = context.args[1].lower() == "on"
+    if await asyncio.to_thread(set_product_enabled, target, enabled):
+        msg = f"{'✅' if enabled else '⏸️'} Producto `{target}` ahora está {'ON' if enabled else 'OFF'}"
+    else:
+        msg = f"ℹ️ No existe el producto `{target}`"
+
+    await update.message.reply_text(msg, parse_mode="Markdown")
+
+
+# ---------- Base de datos (admin) ----------
+async def dbinfo_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    uid = update.effective_user.id
+    if not is_admin(uid):
+        await update.message.reply_text("⛔ Solo el admin puede usar este comando.")
+        return
+
+    rep = await asyncio.to_thread(db_report)
+    rows = rep["rows"]
+    text = (
+        "🗄️ Base de datos\n"
+        "━━━━━━━━━━━━━━\n"
+        f"💾 bot.db: {rep['db_bytes'] / 1024:.0f} KB\n"
+        f"📝 WAL: {rep['wal_bytes'] / 1024:.0f} KB\n"
+        f"🕳️ Páginas libres: {rep['free_pages']}"
+        f"{'' if rep['incremental_vacuum'] else ' (sin auto_vacuum: python main.py --vacuum con el bot apagado)'}\n\n"
+        f"🔁 checks: {rows['checks']}\n"
+        f"🕒 checks_hourly: {rows['checks_hourly']}\n"
+        f"📦 products: {rows['products']}\n"
+        f"🧠 product_memory: {rows['product_memory']}\n"
+        f"📣 events: {rows['events']}"
+    )
+    await update.message.reply_text(text)
+
+
+async def metrics_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    uid = update.effective_user.id
+    if not is_admin(uid):
+        await update.message.reply_text("⛔ Solo el admin puede usar este comando.")
+        return
+
+    await update.message.reply_text(metrics_summary())
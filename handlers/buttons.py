@@ -1,30 +1,52 @@
 # handlers/buttons.py
 from telegram import ReplyKeyboardMarkup
 from config import BASE_SECONDS, PEAK_SECONDS
-from utils.state import is_peak_enabled, is_silent_enabled
+from core.store import get_prefs
 from utils.premium import is_premium
 
-def build_keyboard(user_id: int):
-    premium = is_premium(user_id)
-
-    # Botón Pico (premium)
-    if premium:
-        pico_btn = f"🟢 Pico ON ({PEAK_SECONDS}s)" if is_peak_enabled() else f"⚫ Pico OFF ({BASE_SECONDS}s)"
-    else:
-        pico_btn = "🔒 Pico Premium"
+# Textos de los botones (el router de texto los usa tal cual como claves)
+BTN_CHECK = "🔎 Check"
+BTN_INFO = "📋 Info"
+BTN_HORARIOS = "⏰ Horarios"
+BTN_PRODUCTOS = "📦 Productos"
+BTN_PING = "🏓 Ping"
+BTN_PEAK_ON = f"🟢 Pico ON ({PEAK_SECONDS}s)"
+BTN_PEAK_OFF = f"⚫ Pico OFF ({BASE_SECONDS}s)"
+BTN_PEAK_LOCKED = "🔒 Pico Premium"
+BTN_SILENT_ON = "🔕 Silencio: ON"
+BTN_SILENT_OFF = "🔔 Silencio: OFF"
+BTN_SILENT_LOCKED = "🔒 Silencio Premium"
 
-    # Botón Silencio (premium)
-    if premium:
-        silent_btn = "🔕 Silencio: ON" if is_silent_enabled() else "🔔 Silencio: OFF"
-    else:
-        silent_btn = "🔒 Silencio Premium"
 
+def _markup(pico_btn: str, silent_btn: str) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         [
-            ["🔎 Check", "📋 Info"],
-            ["⏰ Horarios", pico_btn],
-            ["📦 Productos", silent_btn],
-            ["🏓 Ping"],
+            [BTN_CHECK, BTN_INFO],
+            [BTN_HORARIOS, pico_btn],
+            [BTN_PRODUCTOS, silent_btn],
+            [BTN_PING],
         ],
         resize_keyboard=True
-    )
\ No newline at end of file
+    )
+
+
+# Solo hay 5 teclados posibles: se arman 1 vez. La clave es (premium, pico, silencio);
+# al cambiar un toggle cambia la clave del usuario (get_prefs se invalida en el store).
+_KEYBOARDS = {
+    (False, False, False): _markup(BTN_PEAK_LOCKED, BTN_SILENT_LOCKED),
+    **{
+        (True, peak, silent): _markup(BTN_PEAK_ON if peak else BTN_PEAK_OFF,
+                                      BTN_SILENT_ON if silent else BTN_SILENT_OFF)
+        for peak in (False, True) for silent in (False, True)
+    },
+}
+
+
+def keyboard_for(premium: bool, peak: bool, silent: bool) -> ReplyKeyboardMarkup:
+    # sin premium los toggles no se muestran: mismo teclado bloqueado
+    return _KEYBOARDS[(True, peak, silent) if premium else (False, False, False)]
+
+
+def build_keyboard(user_id: int):
+    prefs = get_prefs(user_id) or {}
+    return keyboard_for(is_premium(user_id), bool(prefs.get("peak")), bool(prefs.get("silent")))
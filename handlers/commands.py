@@ -1,27 +1,32 @@
 # handlers/commands.py
 import asyncio
+import re
 import time
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
 
 from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.constants import ChatAction
 
-from config import PRODUCT_NAME, PRODUCT_URL, BASE_SECONDS, PEAK_SECONDS
-from handlers.buttons import build_keyboard
-
-from utils.state import (
-    is_peak_enabled, toggle_peak_enabled,
-    is_silent_enabled, toggle_silent_enabled,
-    get_silent_window
+from config import BASE_SECONDS, PEAK_SECONDS, CHECK_ANIMATION
+from handlers.buttons import (
+    build_keyboard, BTN_CHECK, BTN_INFO, BTN_HORARIOS, BTN_PRODUCTOS, BTN_PING,
+    BTN_PEAK_ON, BTN_PEAK_OFF, BTN_PEAK_LOCKED, BTN_SILENT_ON, BTN_SILENT_OFF, BTN_SILENT_LOCKED,
 )
+
 from utils.premium import is_premium
+from utils.state import get_silent_window
 
 from core.scheduler import is_peak_time
-from core.weverse import fetch_page, is_available
-from core.monitor import get_last_mode
+from core.weverse import get_status, cache_stats
+from core.resilience import CircuitOpen, breaker_summary
+from core.egress import get_pool
+from core.warmstart import startup_report
+from core.monitor import get_last_mode, get_next_delay, schedule_monitor, monitors_here
 from core.store import (
-    init_db, get_memory, update_memory, log_check,
+    get_memory, update_memory, log_check, list_products,
+    subscribe, unsubscribe, follow_product, get_prefs, toggle_peak, toggle_silent,
     stats_today, peak_hours_by_latency, peak_hours_by_changes
 )
 
@@ -34,6 +39,9 @@ def now_sp_hhmm() -> str:
     sp = datetime.now(timezone.utc) + timedelta(hours=-3)
     return sp.strftime("%H:%M")
 
+def minutes_to_hm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
 def progress_bar(pct: int, width: int = 12) -> str:
     filled = int(width * pct / 100)
     return "▰" * filled + "▱" * (width - filled)
@@ -65,15 +73,45 @@ async def premium_locked(update: Update, feature_name: str):
 
 # ---------- Commands ----------
 async def start_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    init_db()
     uid = update.effective_user.id
+    # alta automática: recibe alertas de todos los productos
+    await asyncio.to_thread(subscribe, uid)
     await update.message.reply_text(
         "💜🤖 Bot Restock Weverse ARMY PRO ✅\n"
+        "🔔 Te avisaré cuando haya restock.\n"
         "Usa los botones de abajo 👇",
         reply_markup=build_keyboard(uid)
     )
 
 
+async def stop_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    uid = update.effective_user.id
+    removed = await asyncio.to_thread(unsubscribe, uid)
+    msg = "👋 Ya no recibirás alertas. Vuelve con /start 💜" if removed else "ℹ️ No estabas suscrita."
+    await update.message.reply_text(msg, reply_markup=build_keyboard(uid))
+
+
+async def follow_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # /seguir <id>  ·  /dejar <id>
+    uid = update.effective_user.id
+    follow = update.message.text.lstrip("/").lower().startswith("seguir")
+    usage = "Uso: /seguir <id>" if follow else "Uso: /dejar <id>"
+    if not context.args:
+        await update.message.reply_text(usage)
+        return
+    try:
+        product_id = int(context.args[0])
+    except ValueError:
+        await update.message.reply_text("❌ ID inválido.")
+        return
+
+    if not await asyncio.to_thread(follow_product, uid, product_id, follow):
+        await update.message.reply_text(f"ℹ️ No existe el producto {product_id}")
+        return
+    msg = f"🔔 Ahora sigues el producto {product_id} ✅" if follow else f"🔕 Dejaste de seguir el producto {product_id}"
+    await update.message.reply_text(msg, reply_markup=build_keyboard(uid))
+
+
 async def ping_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     uid = update.effective_user.id
     await update.message.reply_text(
@@ -84,7 +122,11 @@ async def ping_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def horarios_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     uid = update.effective_user.id
-    s_start, s_end = get_silent_window()
+    prefs = get_prefs(uid)
+    if prefs:
+        s_start, s_end = minutes_to_hm(prefs["silent_start"]), minutes_to_hm(prefs["silent_end"])
+    else:
+        s_start, s_end = get_silent_window()
     await update.message.reply_text(
         "⏰ Horarios recomendados (São Paulo) 💜\n"
         "━━━━━━━━━━━━━━━━━━\n"
@@ -98,11 +140,21 @@ async def horarios_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def products_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     uid = update.effective_user.id
+    products = await asyncio.to_thread(list_products)
+
+    if products:
+        lines = "\n".join(
+            [f"{'✅' if enabled else '⏸️'} {pid}) {name}" for pid, name, _, enabled in products]
+        )
+    else:
+        lines = "— Sin productos aún"
+
     await update.message.reply_text(
-        "📦 Productos (base) 💎\n"
+        "📦 Productos vigilados 💎\n"
         "━━━━━━━━━━━━━━\n"
-        f"✅ 1) {PRODUCT_NAME}\n\n"
-        "✨ Próxima mejora: lista editable (agregar/quitar productos) con ON/OFF por producto.",
+        f"{lines}\n\n"
+        "🔔 /seguir <id> · 🔕 /dejar <id>\n"
+        "✨ Admin: /addproducto <url> <nombre> · /producto <id> on|off · /delproducto <id>",
         reply_markup=build_keyboard(uid)
     )
 
@@ -113,7 +165,7 @@ async def silent_toggle_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await premium_locked(update, "Modo Silencio 🔕")
         return
 
-    state = toggle_silent_enabled()
+    state = await asyncio.to_thread(toggle_silent, uid)
     if state:
         msg = "🔕 Silencio ACTIVADO ✅\n💤 Ideal para dormir… yo vigilo por ti, ARMY 💜"
     else:
@@ -127,7 +179,11 @@ async def peak_toggle_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await premium_locked(update, "Modo Pico 🔥")
         return
 
-    state = toggle_peak_enabled()
+    state = await asyncio.to_thread(toggle_peak, uid)
+    # re-agenda ya con el nuevo ritmo (no esperar al delay anterior); una réplica solo de
+    # comandos (RUN_MONITOR=0) o un worker sin productos no arranca un monitor propio
+    if await asyncio.to_thread(monitors_here):
+        schedule_monitor(context.job_queue, when=1)
     if state:
         msg = f"🟢 Pico ACTIVADO 🔥 ({PEAK_SECONDS}s)\n⚡ Modo rápido dentro de horario pico."
     else:
@@ -135,21 +191,43 @@ async def peak_toggle_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(msg, reply_markup=build_keyboard(uid))
 
 
+def _load_info():
+    # todas las lecturas de /info juntas, fuera del event loop
+    products = [(p, get_memory(p[0])) for p in list_products()]
+    return products, stats_today(), peak_hours_by_latency(3), peak_hours_by_changes(3)
+
+
 async def info_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    init_db()
     uid = update.effective_user.id
+    products, stats, top_latency, top_changes = await asyncio.to_thread(_load_info)
 
-    last_status, last_change, last_check = get_memory()
+    def hhmm(ts: str | None) -> str:
+        if not ts:
+            return "—"
+        return ts[11:16]
 
-    if last_status is None:
-        status_txt = "— Sin datos aún"
-    else:
-        status_txt = "🟢 Disponible ✨" if int(last_status) == 1 else "🔴 Agotado"
+    # Estado por producto (memoria propia de cada uno)
+    product_blocks = []
+    for (pid, name, url, enabled), (last_status, last_change, last_check) in products:
+        if last_status is None:
+            status_txt = "— Sin datos aún"
+        else:
+            status_txt = "🟢 Disponible ✨" if int(last_status) == 1 else "🔴 Agotado"
+        if not enabled:
+            status_txt += " (⏸️ OFF)"
+        product_blocks.append(
+            f"🛒 {name}\n"
+            f"🔗 {url}\n"
+            f"📌 {status_txt}\n"
+            f"🕒 Cambio: {hhmm(last_change)} · Verificación: {hhmm(last_check)}"
+        )
+    products_block = "\n\n".join(product_blocks) or "— Sin productos aún"
 
     # Premium lock display
     if is_premium(uid):
-        pico_txt = f"ON 🔥 ({PEAK_SECONDS}s)" if is_peak_enabled() else f"OFF 🛡️ ({BASE_SECONDS}s)"
-        sil_txt = "ON 🔕" if is_silent_enabled() else "OFF 🔔"
+        prefs = get_prefs(uid) or {}
+        pico_txt = f"ON 🔥 ({PEAK_SECONDS}s)" if prefs.get("peak") else f"OFF 🛡️ ({BASE_SECONDS}s)"
+        sil_txt = "ON 🔕" if prefs.get("silent") else "OFF 🔔"
     else:
         pico_txt = "🔒 Premium"
         sil_txt = "🔒 Premium"
@@ -157,11 +235,9 @@ async def info_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     modo_hora = "PICO 🔥" if is_peak_time() else "NORMAL 💤"
     modo_actual = get_last_mode()
 
-    total, errs, avg_ms, max_ms = stats_today()
+    total, errs, avg_ms, max_ms = stats
 
     # Bloques “pico por TUS datos”
-    top_latency = peak_hours_by_latency(3)
-    top_changes = peak_hours_by_changes(3)
 
     if top_latency:
         latency_block = "\n".join([f"• {hour}h — n:{n} — avg:{int(avg)}ms" for hour, n, avg in top_latency])
@@ -173,37 +249,31 @@ async def info_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     else:
         changes_block = "— Aún sin suficientes datos"
 
-    def hhmm(ts: str | None) -> str:
-        if not ts:
-            return "—"
-        return ts[11:16]
-
     await update.message.reply_text(
         "💜 ARMY RESTOCK STATUS 💜\n"
         "━━━━━━━━━━━━━━━━━━\n\n"
-        "🛒 Producto\n"
-        f"{PRODUCT_NAME}\n"
-        f"🔗 {PRODUCT_URL}\n\n"
-        "📌 Estado actual\n"
-        f"{status_txt}\n\n"
-        "🕒 Último cambio de estado\n"
-        f"• {hhmm(last_change)}\n\n"
-        "🕒 Última verificación\n"
-        f"• {hhmm(last_check)}\n\n"
+        "🛒 Productos\n"
+        f"{products_block}\n\n"
         "━━━━━━━━━━━━━━━━━━\n"
         "🛡️ CONFIGURACIÓN DEL BOT\n"
         "━━━━━━━━━━━━━━━━━━\n"
         f"⚙️ Modo Pico: {pico_txt}\n"
         f"🔕 Modo Silencio: {sil_txt}\n"
         f"🕒 Estado actual: {modo_hora}\n"
-        f"🧠 Último modo usado: {modo_actual}\n\n"
+        f"🧠 Último modo usado: {modo_actual}\n"
+        f"⏱️ Próximo chequeo en: {get_next_delay()}\n\n"
         "━━━━━━━━━━━━━━━━━━\n"
         "📊 ACTIVIDAD (24 HORAS)\n"
         "━━━━━━━━━━━━━━━━━━\n"
         f"🔁 Chequeos realizados: {total or 0}\n"
         f"🌐 Errores de red: {errs or 0}\n"
         f"⚡ Latencia promedio: {int(avg_ms) if avg_ms else 0}ms\n"
-        f"🚀 Latencia máxima: {int(max_ms) if max_ms else 0}ms\n\n"
+        f"🚀 Latencia máxima: {int(max_ms) if max_ms else 0}ms\n"
+        f"🧊 Caché: {cache_stats['hits']} hits · {cache_stats['misses']} misses · "
+        f"{cache_stats['coalesced']} compartidos\n"
+        f"🛡️ Weverse: {breaker_summary()}\n"
+        f"🛰️ Salidas: {get_pool().summary()}\n"
+        f"⚡ Arranque: {startup_report()}\n\n"
         "━━━━━━━━━━━━━━━━━━\n"
         "📈 ANÁLISIS ARMY (tus datos)\n"
         "━━━━━━━━━━━━━━━━━━\n"
@@ -217,63 +287,110 @@ async def info_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-async def check_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    init_db()
-    uid = update.effective_user.id
-    chat_id = update.effective_chat.id
+async def _check_one(product, ts: str, mode: str):
+    """Revisa 1 producto y lo registra. Devuelve (producto, resultado|None si hubo error)."""
+    product_id, _, url, _ = product
+    start = time.perf_counter()
+    try:
+        result = await get_status(url)
+        available = result.available
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        if not result.shared:  # lo compartido ya lo registró quien hizo el fetch
+            log_check(mode=mode, available=int(available), latency_ms=latency_ms, error=None,
+                      product_id=product_id, egress=result.egress)
+        update_memory(product_id=product_id, new_status=int(available), check_ts=ts)
+        return product, result
+    except CircuitOpen:
+        return product, None  # Weverse en pausa: no hubo request que registrar
+    except Exception as e:
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        log_check(mode=mode, available=0, latency_ms=latency_ms, error=str(e), product_id=product_id,
+                  egress=getattr(e, "egress", None))
+        return product, None
 
+
+async def _animated_progress(update: Update, context: ContextTypes.DEFAULT_TYPE, uid: int):
+    """Barra de progreso clásica (opt-in: /check anim). Corre mientras el fetch ya está en curso."""
     steps = [10, 20, 35, 70, 90, 100]
-    mode = "MANUAL"
 
     # teclado siempre visible
     await update.message.reply_text("🔎 Preparando revisión… 💜", reply_markup=build_keyboard(uid))
 
-    await context.bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
+    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
     msg = await update.message.reply_text(f"⏳ Revisando stock…\n{progress_bar(10)} 10%")
 
+    for pct in steps[1:-1]:
+        await asyncio.sleep(0.25)
+        ok = await safe_edit(msg, f"⏳ Revisando stock…\n{progress_bar(pct)} {pct}%")
+        if not ok:
+            msg = await update.message.reply_text(f"⏳ Revisando stock…\n{progress_bar(pct)} {pct}%")
+    return msg
+
+
+async def check_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    uid = update.effective_user.id
+    mode = "MANUAL"
+    animate = CHECK_ANIMATION or bool(context.args and context.args[0].lower() in ("anim", "animado"))
+
     start = time.perf_counter()
     ts = now_sp_iso()
     hhmm = now_sp_hhmm()
 
-    try:
-        # animación
-        for pct in steps[1:-1]:
-            await asyncio.sleep(0.25)
-            ok = await safe_edit(msg, f"⏳ Revisando stock…\n{progress_bar(pct)} {pct}%")
-            if not ok:
-                msg = await update.message.reply_text(f"⏳ Revisando stock…\n{progress_bar(pct)} {pct}%")
-
-        # request real (en hilo)
-        html = await asyncio.to_thread(fetch_page)
-        available = bool(is_available(html))
-        latency_ms = int((time.perf_counter() - start) * 1000)
+    # el fetch arranca YA, en paralelo con el mensaje de espera
+    products = await asyncio.to_thread(list_products, True)
 
-        # guardar stats y memoria
-        log_check(ts=ts, mode=mode, available=int(available), latency_ms=latency_ms, error=None)
-        update_memory(new_status=int(available), check_ts=ts)
+    async def timed_fetch():
+        results = await asyncio.gather(*(_check_one(p, ts, mode) for p in products))
+        return results, int((time.perf_counter() - start) * 1000)
 
-        await asyncio.sleep(0.15)
-        await safe_edit(msg, f"✅ Listo.\n{progress_bar(100)} 100%") or await update.message.reply_text(
-            f"✅ Listo.\n{progress_bar(100)} 100%"
-        )
-        await asyncio.sleep(0.15)
+    fetch = asyncio.ensure_future(timed_fetch())
 
-        if available:
+    if animate:
+        msg = await _animated_progress(update, context, uid)
+        edit_retries = 3
+    else:
+        # modo rápido: 1 solo mensaje de espera (con teclado) y 1 sola edición con el resultado
+        msg = await update.message.reply_text("🔎 Revisando stock… 💜", reply_markup=build_keyboard(uid))
+        edit_retries = 1
+
+    try:
+        results, latency_ms = await fetch
+
+        if animate:
+            await asyncio.sleep(0.15)
+            await safe_edit(msg, f"✅ Listo.\n{progress_bar(100)} 100%") or await update.message.reply_text(
+                f"✅ Listo.\n{progress_bar(100)} 100%"
+            )
+            await asyncio.sleep(0.15)
+
+        ok_results = [(p, result) for p, result in results if result is not None]
+        if not ok_results:
+            raise RuntimeError("ningún producto respondió")
+
+        in_stock = [(p, result) for p, result in ok_results if result.available]
+        names = "\n".join([f"🛒 {p[1]}" for p, _ in ok_results])
+
+        if in_stock:
+            stock_lines = "\n".join([
+                f"🛒 {p[1]}\n"
+                + (f"🎯 {', '.join(result.options_in_stock())}\n" if result.options else "")
+                + f"👉 {p[2]}"
+                for p, result in in_stock
+            ])
             text = (
                 "💜🚨 ARMY ALERT 🚨💜\n\n"
                 "🟢 ¡Parece DISPONIBLE ahora!\n\n"
-                f"🛒 {PRODUCT_NAME}\n"
+                f"{stock_lines}\n\n"
                 f"🕒 Revisión: {hhmm}\n"
                 f"⚡ Respuesta del sitio: {latency_ms/1000:.1f}s\n\n"
-                "🔥 Corre ARMY, es ahora 🔥\n"
-                f"👉 {PRODUCT_URL}"
+                "🔥 Corre ARMY, es ahora 🔥"
             )
-            await safe_edit(msg, text) or await update.message.reply_text(text, reply_markup=build_keyboard(uid))
+            await safe_edit(msg, text, retries=edit_retries) or await update.message.reply_text(text, reply_markup=build_keyboard(uid))
         else:
             text = (
                 "💜 ARMY UPDATE 💜\n\n"
                 "❌ Aún no hay stock disponible\n"
-                f"🛒 {PRODUCT_NAME}\n\n"
+                f"{names}\n\n"
                 f"🕒 Última revisión: {hhmm}\n"
                 f"⚡ Respuesta del sitio: {latency_ms/1000:.1f}s\n\n"
                 "⏳ El bot sigue vigilando sin descanso…\n"
@@ -281,15 +398,14 @@ async def check_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             fallback = (
                 "❌ Sin stock por ahora, ARMY 💜\n"
-                f"🛒 {PRODUCT_NAME}\n"
+                f"{names}\n"
                 f"🕒 {hhmm}\n\n"
                 "⏳ Seguimos atentos…"
             )
-            await safe_edit(msg, text) or await update.message.reply_text(fallback, reply_markup=build_keyboard(uid))
+            await safe_edit(msg, text, retries=edit_retries) or await update.message.reply_text(fallback, reply_markup=build_keyboard(uid))
 
-    except Exception as e:
+    except Exception:
         latency_ms = int((time.perf_counter() - start) * 1000)
-        log_check(ts=ts, mode=mode, available=0, latency_ms=latency_ms, error=str(e))
 
         err_text = (
             "🌐⚠️ ARMY UPDATE ⚠️🌐\n\n"
@@ -298,38 +414,77 @@ async def check_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"🕒 {hhmm}\n"
             f"⚡ {latency_ms/1000:.1f}s"
         )
-        await safe_edit(msg, err_text) or await update.message.reply_text(err_text, reply_markup=build_keyboard(uid))
+        await safe_edit(msg, err_text, retries=edit_retries) or await update.message.reply_text(err_text, reply_markup=build_keyboard(uid))
+
+
+async def _peak_locked(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await premium_locked(update, "Modo Pico 🔥")
+
+
+async def _silent_locked(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await premium_locked(update, "Modo Silencio 🔕")
+
+
+def _norm(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+# Botones: texto exacto -> handler (O(1), sin ambigüedad)
+_BUTTONS = {
+    _norm(BTN_CHECK): check_cmd,
+    _norm(BTN_INFO): info_cmd,
+    _norm(BTN_HORARIOS): horarios_cmd,
+    _norm(BTN_PRODUCTOS): products_cmd,
+    _norm(BTN_PING): ping_cmd,
+    _norm(BTN_PEAK_ON): peak_toggle_cmd,
+    _norm(BTN_PEAK_OFF): peak_toggle_cmd,
+    _norm(BTN_SILENT_ON): silent_toggle_cmd,
+    _norm(BTN_SILENT_OFF): silent_toggle_cmd,
+    _norm(BTN_PEAK_LOCKED): _peak_locked,
+    _norm(BTN_SILENT_LOCKED): _silent_locked,
+}
+
+# Texto libre: palabras completas (no substrings: "pico" + "on" ya no matchea "contigo")
+_KEYWORDS = {
+    "check": check_cmd, "revisar": check_cmd, "revisa": check_cmd, "revision": check_cmd, "revisión": check_cmd,
+    "info": info_cmd, "ping": ping_cmd, "horarios": horarios_cmd, "horario": horarios_cmd,
+    "productos": products_cmd, "producto": products_cmd,
+}
+_WORD = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=512)
+def _route(text: str):
+    """Handler para un texto normalizado (None = no se entendió)."""
+    handler = _BUTTONS.get(text)
+    if handler is not None:
+        return handler
+
+    words = _WORD.findall(text)
+    if "premium" in words and "pico" in words:
+        return _peak_locked
+    if "premium" in words and "silencio" in words:
+        return _silent_locked
+    if "pico" in words and ("on" in words or "off" in words):
+        return peak_toggle_cmd
+    if "silencio" in words:
+        return silent_toggle_cmd
+    for word in words:
+        if word in _KEYWORDS:
+            return _KEYWORDS[word]
+    # errores de tipeo ("horaios", "chek"): la palabra conocida más parecida
+    from difflib import get_close_matches  # solo en este camino raro (no al arrancar)
+    for word in words:
+        close = get_close_matches(word, _KEYWORDS, n=1, cutoff=0.8)
+        if close:
+            return _KEYWORDS[close[0]]
+    return None
 
 
 async def text_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    txt = (update.message.text or "").strip().lower()
-    uid = update.effective_user.id
-
-    # Botones bloqueados (premium)
-    if "pico premium" in txt:
-        await premium_locked(update, "Modo Pico 🔥")
+    handler = _route(_norm(update.message.text or ""))
+    if handler is not None:
+        await handler(update, context)
         return
-    if "silencio premium" in txt:
-        await premium_locked(update, "Modo Silencio 🔕")
-        return
-
-    # Toggles premium
-    if "pico" in txt and ("on" in txt or "off" in txt):
-        await peak_toggle_cmd(update, context)
-        return
-    if "silencio" in txt:
-        await silent_toggle_cmd(update, context)
-        return
-
-    if "check" in txt or "revis" in txt:
-        await check_cmd(update, context)
-    elif "info" in txt:
-        await info_cmd(update, context)
-    elif "ping" in txt:
-        await ping_cmd(update, context)
-    elif "horarios" in txt:
-        await horarios_cmd(update, context)
-    elif "productos" in txt:
-        await products_cmd(update, context)
-    else:
-        await update.message.reply_text("Usa los botones 👇💜", reply_markup=build_keyboard(uid))
\ No newline at end of file
+    uid = update.effective_user.id
+    await update.message.reply_text("Usa los botones 👇💜", reply_markup=build_keyboard(uid))
@@ -1,31 +1,23 @@
 # main.py
-import os
-import asyncio
-import logging
-
-from telegram.ext import (
-    Application,
-    ApplicationBuilder,
-    CommandHandler,
-    MessageHandler,
-    ContextTypes,
-    filters,
-)
-from telegram.error import Conflict, NetworkError, RetryAfter
+import time
 
-from config import BOT_TOKEN, BASE_SECONDS, PEAK_SECONDS
-from core.monitor import monitor_peak, monitor_normal
-from core.store import init_db
+_BOOT = time.perf_counter()  # antes de los imports pesados: el arranque se mide desde acá
 
-from handlers.commands import (
-    start_cmd, ping_cmd, horarios_cmd, products_cmd,
-    silent_toggle_cmd, peak_toggle_cmd, info_cmd, check_cmd,
-    text_router
-)
-from handlers.admin import (
-    myid_cmd, addpremium_cmd, delpremium_cmd, premiumlist_cmd
+import os  # noqa: E402
+import sys  # noqa: E402
+import signal  # noqa: E402
+import logging  # noqa: E402
+import argparse  # noqa: E402
+import subprocess  # noqa: E402
+
+from config import (  # noqa: E402
+    BOT_TOKEN, PEAK_SECONDS, ADAPTIVE_MAX_SECONDS, MAINTENANCE_SECONDS,
+    WEBHOOK_URL, WEBHOOK_SECRET, RUN_MONITOR, METRICS_LISTEN, METRICS_PORT, CLUSTER, ALLOWED_UPDATES,
 )
 
+# telegram.ext / httpx / apscheduler y los handlers se importan en build_app():
+# el supervisor (--workers) y --profile-startup arrancan sin cargarlos.
+
 # ✅ Logs: SOLO lo esencial (quita spam de apscheduler/httpx)
 logging.basicConfig(level=logging.WARNING)
 logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -33,13 +25,14 @@ logging.getLogger("apscheduler").setLevel(logging.WARNING)
 logging.getLogger("telegram").setLevel(logging.WARNING)
 
 
-async def error_handler(update, context: ContextTypes.DEFAULT_TYPE):
+async def error_handler(update, context):
+    from telegram.error import Conflict, NetworkError, RetryAfter
+
     err = context.error
 
     if isinstance(err, RetryAfter):
-        wait = getattr(err, "retry_after", 3)
-        print(f"⏳ Rate limit: esperando {wait}s…")
-        await asyncio.sleep(wait)
+        # las alertas ya respetan el límite en core/dispatcher; aquí solo avisamos
+        print(f"⏳ Rate limit en una respuesta: Telegram pide {err.retry_after}s")
         return
 
     if isinstance(err, NetworkError):
@@ -48,24 +41,125 @@ async def error_handler(update, context: ContextTypes.DEFAULT_TYPE):
 
     if isinstance(err, Conflict):
         print("⛔ Conflict: otra instancia del bot está corriendo.")
-        print("✅ Cierra Termux/Pydroid completamente y corre SOLO 1 vez.")
+        print("✅ Cierra Termux/Pydroid completamente y corre SOLO 1 vez (o usa --workers N / CLUSTER=1).")
         return
 
     print(f"❌ Error no manejado: {err}")
 
 
-def main():
+async def _start_cluster(application):
+    from core.cluster import init_cluster
+    from core.dispatcher import get_dispatcher
+    from core.monitor import schedule_monitor
+
+    async def on_rebalance(workers: int):
+        dispatcher = get_dispatcher()
+        if dispatcher is not None:
+            dispatcher.set_share(workers)
+        if RUN_MONITOR:
+            # los productos que heredamos se revisan ya, no en el próximo tick
+            schedule_monitor(application.job_queue, when=1)
+
+    async def on_leader(leader: bool):
+        if WEBHOOK_URL:
+            return  # en webhook cualquier instancia recibe updates; el líder solo hace mantenimiento
+        updater = application.updater
+        if leader and not updater.running:
+            await updater.start_polling(poll_interval=1.5, timeout=30, allowed_updates=ALLOWED_UPDATES)
+            print("📡 Polling de Telegram activo en este worker")
+        elif not leader and updater.running:
+            await updater.stop()
+
+    await init_cluster(on_rebalance=on_rebalance, on_leader=on_leader).start()
+
+
+def supervise(workers: int):
+    """
+    python main.py --workers N: lanza N procesos en modo cluster sobre la misma bot.db
+    y relanza el que se muera (mientras tanto sus productos los toma otro worker).
+    """
+    env = {**os.environ, "CLUSTER": "1"}
+    cmd = [sys.executable, os.path.abspath(__file__)]
+    procs = [subprocess.Popen(cmd, env=env) for _ in range(workers)]
+    print(f"🧩 Supervisor: {workers} workers")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while not stopping:
+        time.sleep(1)
+        for i, proc in enumerate(procs):
+            if proc.poll() is not None and not stopping:
+                print(f"⚠️ Worker {proc.pid} terminó ({proc.returncode}); relanzando…")
+                time.sleep(2)
+                procs[i] = subprocess.Popen(cmd, env=env)
+
+    for proc in procs:
+        if proc.poll() is None:
+            proc.terminate()
+    for proc in procs:
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def vacuum_offline():
+    from core.store import init_db, enable_incremental_vacuum, close_db
+
+    init_db()
+    print("🧹 VACUUM completo…")
+    changed = enable_incremental_vacuum()
+    close_db()
+    print("✅ auto_vacuum INCREMENTAL activado" if changed else "ℹ️ auto_vacuum ya era INCREMENTAL")
+
+
+def build_app():
+    """Arma la Application (DB, estado guardado, handlers, jobs) sin conectarse a Telegram."""
+    from telegram.ext import Application, ApplicationBuilder, CommandHandler, MessageHandler, filters
+
+    from core import warmstart
+    from core.monitor import schedule_monitor, restore_schedule
+    from core.maintenance import maintenance_job
+    from core.store import init_db, start_writer, stop_writer, close_db
+    from core.weverse import init_client, close_client
+    from core.dispatcher import init_dispatcher, stop_dispatcher
+    from core.cluster import stop_cluster
+    from handlers.commands import (
+        start_cmd, stop_cmd, follow_cmd, ping_cmd, horarios_cmd, products_cmd,
+        silent_toggle_cmd, peak_toggle_cmd, info_cmd, check_cmd,
+        text_router
+    )
+    from handlers.admin import (
+        myid_cmd, addpremium_cmd, delpremium_cmd, premiumlist_cmd,
+        addproduct_cmd, delproduct_cmd, product_toggle_cmd, dbinfo_cmd, metrics_cmd
+    )
+
     if not BOT_TOKEN:
         raise RuntimeError("Falta BOT_TOKEN en config.py o en variables de entorno.")
 
+    if WEBHOOK_URL and not WEBHOOK_SECRET:
+        raise RuntimeError("Modo webhook requiere WEBHOOK_SECRET.")
+
     print("▶️ Iniciando bot…")
+    warmstart.mark_boot(_BOOT)
     init_db()
+    warm = warmstart.restore()
+    restore_schedule(warm["mode"], warm["delay"])
     print("✅ Bot creado")
 
     app = ApplicationBuilder().token(BOT_TOKEN).build()
 
     # ✅ Comandos básicos
     app.add_handler(CommandHandler("start", start_cmd))
+    app.add_handler(CommandHandler("stop", stop_cmd))
+    app.add_handler(CommandHandler(["seguir", "dejar"], follow_cmd))
     app.add_handler(CommandHandler("ping", ping_cmd))
     app.add_handler(CommandHandler("horarios", horarios_cmd))
     app.add_handler(CommandHandler("productos", products_cmd))
@@ -82,37 +176,115 @@ def main():
     app.add_handler(CommandHandler("delpremium", delpremium_cmd))
     app.add_handler(CommandHandler("premiumlist", premiumlist_cmd))
 
+    # ✅ Admin productos
+    app.add_handler(CommandHandler("addproducto", addproduct_cmd))
+    app.add_handler(CommandHandler("delproducto", delproduct_cmd))
+    app.add_handler(CommandHandler("producto", product_toggle_cmd))
+    app.add_handler(CommandHandler("db", dbinfo_cmd))
+    app.add_handler(CommandHandler("metrics", metrics_cmd))
+
     # ✅ Router de botones/texto
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_router))
 
     # ✅ Error handler
     app.add_error_handler(error_handler)
 
-    # ✅ 2 JOBS (sin .interval)
-    app.job_queue.run_repeating(monitor_peak, interval=PEAK_SECONDS, first=10)
-    app.job_queue.run_repeating(monitor_normal, interval=BASE_SECONDS, first=10)
-    print(f"⏱️ Monitores activos: PICO={PEAK_SECONDS}s | NORMAL={BASE_SECONDS}s")
+    if RUN_MONITOR:
+        # ✅ 1 JOB adaptativo (one-shot que se re-agenda solo)
+        # arranque en caliente: se retoma enseguida con validadores y veredictos guardados
+        schedule_monitor(app.job_queue, when=warm["first_delay"])
+        print(f"⏱️ Monitor adaptativo: {PEAK_SECONDS}s–{ADAPTIVE_MAX_SECONDS}s")
+
+        # ✅ Mantenimiento DB (retención + compactación)
+        app.job_queue.run_repeating(maintenance_job, interval=MAINTENANCE_SECONDS, first=120)
+    else:
+        print("ℹ️ RUN_MONITOR=0: esta instancia solo atiende comandos")
 
-    # ✅ Limpia webhook + cola
+    metrics_server = None
+
+    # ✅ Cliente HTTP compartido + limpia webhook + cola
     async def post_init(application: Application):
+        nonlocal metrics_server
+        await init_client()
+        await start_writer()
+        init_dispatcher(application.bot)
+        restored = warmstart.restore_pending_alerts()
+        if restored:
+            print(f"♻️ {restored} recordatorios de alerta re-agendados")
+        warmstart.mark_ready()
+        if CLUSTER:
+            await _start_cluster(application)
+        if METRICS_PORT:
+            from core.webhook import start_metrics_server  # servidor HTTP propio: solo si se usa
+            metrics_server = await start_metrics_server(METRICS_LISTEN, METRICS_PORT, application)
+        if WEBHOOK_URL:
+            return  # en webhook el set_webhook lo hace run_webhook de PTB
         try:
-            await application.bot.delete_webhook(drop_pending_updates=True)
+            # en cluster no se descarta la cola: puede ser un worker que entra con el líder ya corriendo
+            await application.bot.delete_webhook(drop_pending_updates=not CLUSTER)
             print("🧹 Webhook/cola limpiados. Listo ✅")
         except Exception as e:
             print(f"⚠️ No se pudo limpiar webhook/cola: {e}")
 
+    async def post_shutdown(application: Application):
+        if metrics_server is not None:
+            await metrics_server.stop()
+        await stop_cluster()
+        leftover = await stop_dispatcher()
+        await close_client()
+        try:
+            warmstart.save_pending(leftover or [])
+        except Exception as e:
+            print(f"⚠️ Recordatorios no guardados: {e}")
+        await stop_writer()  # vacía la cola: el estado queda escrito antes de cerrar
+        close_db()
+
     app.post_init = post_init
+    app.post_shutdown = post_shutdown
+    return app
+
+
+def main():
+    import asyncio
+
+    app = build_app()
 
     print("✅ Comandos + botones listos")
     print("🤖 Corriendo… en Telegram manda /start")
 
+    if WEBHOOK_URL:
+        from core.webhook import run_webhook
+        run_webhook(app)
+        return
+
+    if CLUSTER:
+        from core.cluster import run_until_signal
+        # el polling lo arranca solo el líder (ver _start_cluster)
+        asyncio.run(run_until_signal(app))
+        return
+
     app.run_polling(
         drop_pending_updates=True,
         poll_interval=1.5,
         timeout=30,
-        allowed_updates=["message", "callback_query"]
+        allowed_updates=ALLOWED_UPDATES
     )
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Bot de stock Weverse")
+    parser.add_argument("--workers", type=int, default=0, help="N procesos en modo cluster (supervisor)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="mide imports, tiempo y memoria del arranque (sin conectarse a Telegram)")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="compacta bot.db y activa auto_vacuum incremental (con el bot apagado)")
+    args = parser.parse_args()
+    if args.vacuum:
+        vacuum_offline()
+    elif args.profile_startup:
+        from tools.startup_profile import profile_startup
+        profile_startup()
+    elif args.workers > 0:
+        supervise(args.workers)
+    else:
+        main()
\ No newline at end of file
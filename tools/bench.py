@@ -0,0 +1,733 @@
+# tools/bench.py
+"""
+Benchmarks offline contra simuladores locales (tools/simulators.py).
+
+    python tools/bench.py                      # todo, tamaños por defecto
+    python tools/bench.py --quick              # versión corta (segundos)
+    python tools/bench.py parse fetch --out bench.json
+    python tools/bench.py --baseline old.json  # compara contra una corrida anterior
+
+Escenarios:
+  parse   is_available() sobre páginas grabadas (µs por llamada)
+  fetch   requests.get del original (si está instalado) vs fetch_page()+is_available() vs fetch_status()
+  alert   _run_check de punta a punta: de "vuelve el stock" al primer sendMessage
+          + intentos del dispatcher por cada tipo de error de Telegram
+  store   throughput de escrituras (write-behind en lotes vs directo)
+  info    latencia de las consultas de /info con N checks crudos (1M por defecto)
+  egress  pool de salidas con proxies locales (rápido / medio / lento): reparto y failover
+  confirm confirmación por quórum (sondas paralelas escalonadas) vs la doble lectura secuencial original
+  calls   llamadas a la Bot API y requests a Weverse por /check (rápido vs animado) y por tick del monitor
+  router  text_router por mensaje (botones exactos y texto libre) vs el router original, sin red ni Telegram
+
+La salida es JSON (stdout o --out) para comparar entre versiones.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from telegram import Bot, ReplyKeyboardMarkup, Update  # noqa: E402
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut  # noqa: E402
+
+try:  # solo para la línea base del original (ya no es dependencia del bot)
+    import requests
+except ImportError:
+    requests = None
+
+from config import BASE_SECONDS, EVENT_SOLDOUT_CHECKS, PEAK_SECONDS, TG_SEND_RETRIES, USER_AGENT  # noqa: E402
+from core import egress, store, weverse  # noqa: E402
+from core.dispatcher import Dispatcher, stop_dispatcher  # noqa: E402
+from core.metrics import phase_seconds  # noqa: E402
+from core.confirm import confirm_available  # noqa: E402
+from core.monitor import _run_check  # noqa: E402
+from handlers import commands  # noqa: E402
+from handlers.commands import _load_info, check_cmd, text_router  # noqa: E402
+from fake_update import fake_update  # noqa: E402
+from simulators import STATES, ProxySim, TelegramSim, WeverseSim, build_page  # noqa: E402
+from utils.premium import is_premium  # noqa: E402
+
+SCENARIOS = ("parse", "fetch", "alert", "store", "info", "egress", "confirm", "calls", "router")
+
+
+# ---------- helpers ----------
+def pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def latency_summary(samples_s: list[float]) -> dict:
+    ms = [s * 1000 for s in samples_s]
+    return {
+        "n": len(ms),
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "p50_ms": round(pct(ms, 50), 3),
+        "p95_ms": round(pct(ms, 95), 3),
+        "max_ms": round(max(ms), 3) if ms else 0.0,
+    }
+
+
+def fresh_db(tmpdir: str, name: str):
+    """Apunta core/store a una DB nueva en tmpdir (nunca a core/bot.db)."""
+    store.close_db()
+    store.DB_PATH = os.path.join(tmpdir, f"{name}.db")
+    store._subscriptions_changed()
+    store.init_db()
+
+
+def reset_weverse():
+    weverse._results.clear()
+    weverse._validators.clear()
+
+
+def git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+# ---------- escenarios ----------
+def _time_calls(fn, html: str, iters: int) -> float:
+    fn(html)  # warm-up
+    start = time.perf_counter()
+    for _ in range(iters):
+        fn(html)
+    return (time.perf_counter() - start) / iters
+
+
+def bench_parse(args) -> dict:
+    out = {}
+    for state in STATES:
+        html = build_page(state, args.page_kb).lower()
+        secs = _time_calls(weverse.is_available, html, args.parse_iters)
+        out[state] = {
+            "iters": args.parse_iters,
+            "us_per_call": round(secs * 1e6, 2),
+            "mb_per_s": round(len(html) / secs / 1e6, 1),
+        }
+    return out
+
+
+async def _fetch_round(urls: list[str], n: int, concurrency: int, fn) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    samples: list[float] = []
+
+    async def one(i):
+        async with sem:
+            t0 = time.perf_counter()
+            await fn(urls[i % len(urls)])
+            samples.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    elapsed = time.perf_counter() - start
+    return {"rps": round(n / elapsed, 1), **latency_summary(samples)}
+
+
+async def bench_fetch(args) -> dict:
+    sim = await WeverseSim(latency=args.latency, jitter=args.jitter, size_kb=args.page_kb).start()
+    urls = sim.add_products(4)
+    await weverse.init_client()
+
+    async def full(url):
+        weverse.is_available(await weverse.fetch_page(url))
+
+    async def stream(url):
+        await weverse.fetch_status(url, conditional=False)
+
+    async def unchanged(url):
+        # el simulador no manda ETag: mismo cuerpo → mismo hash → veredicto reutilizado sin parsear
+        await weverse.fetch_status(url)
+
+    flows = [("fetch_page+is_available", full), ("fetch_status", stream), ("fetch_status (mismo hash)", unchanged)]
+    if requests is not None:
+        def legacy_sync(url):
+            # como el original: requests.get sin sesión (conexión nueva cada vez), timeout 25s
+            r = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=25)
+            r.raise_for_status()
+            return weverse.is_available(r.text.lower())
+
+        async def legacy(url):
+            # en un hilo para que compita con la misma concurrencia (el original bloqueaba el loop)
+            await asyncio.to_thread(legacy_sync, url)
+
+        flows.insert(0, ("requests (original)", legacy))
+
+    out = {} if requests is not None else {"requests (original)": "omitido: requests no está instalado"}
+    try:
+        for state in STATES:
+            sim.set_state(state)
+            out[state] = {}
+            for name, fn in flows:
+                await _fetch_round(urls, min(10, args.fetch_n), args.concurrency, fn)  # warm-up (conexiones)
+                out[state][name] = await _fetch_round(urls, args.fetch_n, args.concurrency, fn)
+    finally:
+        await weverse.close_client()
+        await sim.stop()
+    return out
+
+
+# chat_id -> (error que tira el bot falso, intentos esperados, ¿termina enviado?)
+_DISPATCH_CASES = {
+    1: (Forbidden("bot was blocked by the user"), 1, False),
+    2: (BadRequest("chat not found"), 1, False),
+    3: (TimedOut(), TG_SEND_RETRIES, False),
+    4: (NetworkError("connection reset"), TG_SEND_RETRIES, False),
+    5: (RetryAfter(1), 2, True),  # solo la 1ª vez: espera y reintenta
+    6: (ValueError("bug"), 1, False),
+}
+
+
+async def dispatch_errors() -> dict:
+    """Cuántas veces intenta el dispatcher cada mensaje según el error (sin red: bot falso)."""
+    attempts: dict[int, int] = {}
+    delivered: set[int] = set()
+
+    class ErrorBot:
+        async def send_message(self, chat_id, text, **kwargs):
+            attempts[chat_id] = attempts.get(chat_id, 0) + 1
+            error, _, ok = _DISPATCH_CASES[chat_id]
+            if ok and attempts[chat_id] > 1:
+                delivered.add(chat_id)
+                return
+            raise error
+
+    dispatcher = Dispatcher(ErrorBot(), workers=len(_DISPATCH_CASES))
+    with contextlib.redirect_stdout(sys.stderr):  # los avisos del dispatcher no van al JSON
+        dispatcher.start()
+        for chat_id in _DISPATCH_CASES:
+            dispatcher.send(chat_id, "bench")
+        await dispatcher.stop(timeout=30)
+
+    out, mismatches = {}, 0
+    for chat_id, (error, expected, ok) in _DISPATCH_CASES.items():
+        got = attempts.get(chat_id, 0)
+        mismatches += got != expected or (chat_id in delivered) != ok
+        out[type(error).__name__] = {"attempts": got, "expected_attempts": expected, "delivered": chat_id in delivered}
+    out["mismatches"] = mismatches
+    return out
+
+
+async def bench_alert(args, tmpdir: str) -> dict:
+    fresh_db(tmpdir, "alert")
+    await store.start_writer()
+    wsim = await WeverseSim(latency=args.latency, jitter=args.jitter, size_kb=args.page_kb).start()
+    tsim = await TelegramSim(latency=args.tg_latency).start()
+    await weverse.init_client()
+    bot = Bot(tsim.token, base_url=tsim.base_url)
+    await bot.initialize()
+    context = SimpleNamespace(bot=bot, job_queue=None)
+
+    for product_id, *_ in store.list_products():
+        store.set_product_enabled(product_id, False)
+    for i in range(args.subscribers):
+        store.subscribe(1_000_000 + i)
+
+    to_first: list[float] = []
+    to_all: list[float] = []
+    check_s: list[float] = []
+    prev_id = None
+    try:
+        for trial in range(args.alert_trials):
+            # un producto nuevo por intento: sin cooldown ni estado previo
+            url = wsim.add_products(1)[0]
+            product_id = store.add_product(f"BENCH {trial}", url)
+            if prev_id is not None:
+                store.set_product_enabled(prev_id, False)
+            prev_id = product_id
+
+            wsim.set_state("soldout")
+            for _ in range(max(1, EVENT_SOLDOUT_CHECKS)):
+                reset_weverse()
+                await _run_check(context, "BENCH")
+
+            tsim.reset()
+            reset_weverse()
+            wsim.set_state("available")
+            t0 = time.monotonic()
+            await _run_check(context, "BENCH")
+            check_s.append(time.monotonic() - t0)
+            first = await tsim.wait_first_message()
+            to_first.append(first - t0)
+            deadline = time.monotonic() + 30
+            while len(tsim.messages) < args.subscribers and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            to_all.append(tsim.messages[-1][0] - t0)
+    finally:
+        await stop_dispatcher()
+        await bot.shutdown()
+        await weverse.close_client()
+        await tsim.stop()
+        await wsim.stop()
+        await store.stop_writer()
+        store.close_db()
+
+    return {
+        "errors": await dispatch_errors(),
+        "subscribers": args.subscribers,
+        "trials": args.alert_trials,
+        "run_check": latency_summary(check_s),
+        "time_to_first_alert": latency_summary(to_first),
+        "time_to_all_alerts": latency_summary(to_all),
+    }
+
+
+async def bench_store(args, tmpdir: str) -> dict:
+    out = {}
+    now = int(time.time())
+
+    fresh_db(tmpdir, "store_batched")
+    pid = store.list_products()[0][0]
+    await store.start_writer()
+    start = time.perf_counter()
+    for i in range(args.store_n):
+        store.log_check("BENCH", i % 2, 300 + i % 50, None, product_id=pid, ts=now + i)
+    queued = time.perf_counter() - start
+    await store.stop_writer()
+    elapsed = time.perf_counter() - start
+    out["write_behind"] = {"rows": args.store_n, "rows_per_s": round(args.store_n / elapsed),
+                           "enqueue_us": round(queued / args.store_n * 1e6, 2)}
+
+    direct_n = max(1, args.store_n // 10)
+    fresh_db(tmpdir, "store_direct")
+    start = time.perf_counter()
+    for i in range(direct_n):
+        store.log_check("BENCH", i % 2, 300 + i % 50, None, product_id=pid, ts=now + i)
+    elapsed = time.perf_counter() - start
+    out["direct"] = {"rows": direct_n, "rows_per_s": round(direct_n / elapsed)}
+    store.close_db()
+    return out
+
+
+def _populate_checks(rows: int, products: list[int], days: int = 14):
+    """Carga masiva: checks crudos + rollup reconstruido (como lo dejaría la migración v2)."""
+    rnd = random.Random(42)
+    now = int(time.time())
+    step = days * 24 * 3600 / max(1, rows // len(products))
+    with store._write() as con:
+        batch = []
+        for i in range(rows):
+            pid = products[i % len(products)]
+            ts = now - int((i // len(products)) * step)
+            err = "ReadTimeout" if rnd.random() < 0.01 else None
+            batch.append((pid, ts, "NORMAL", int(rnd.random() < 0.02), rnd.randint(150, 2500), err))
+            if len(batch) >= 50_000:
+                con.executemany("INSERT INTO checks(product_id,ts,mode,available,latency_ms,error) "
+                                "VALUES (?,?,?,?,?,?)", batch)
+                batch.clear()
+        if batch:
+            con.executemany("INSERT INTO checks(product_id,ts,mode,available,latency_ms,error) "
+                            "VALUES (?,?,?,?,?,?)", batch)
+        con.execute("DELETE FROM checks_hourly")
+        con.execute("""
+            INSERT INTO checks_hourly(product_id,hour,n,errors,latency_sum,latency_max,ok_n,ok_latency_sum)
+            SELECT product_id, ts - ts % 3600, COUNT(*), SUM(error IS NOT NULL), SUM(latency_ms), MAX(latency_ms),
+                   SUM(error IS NULL), SUM(CASE WHEN error IS NULL THEN latency_ms ELSE 0 END)
+            FROM checks GROUP BY product_id, ts - ts % 3600
+        """)
+        con.executemany("INSERT INTO events(product_id,kind,ts,duration_s,alerted) VALUES (?,?,?,?,1)",
+                        [(rnd.choice(products), "restock", now - rnd.randint(0, days * 86400), None)
+                         for _ in range(200)])
+
+
+def bench_info(args, tmpdir: str) -> dict:
+    fresh_db(tmpdir, "info")
+    products = [store.list_products()[0][0]]
+    products += [store.add_product(f"BENCH {i}", f"http://127.0.0.1/sales/{i}") for i in range(2)]
+
+    start = time.perf_counter()
+    _populate_checks(args.info_rows, products)
+    populate_s = time.perf_counter() - start
+
+    _load_info()  # warm-up (páginas en caché del SO)
+    samples = []
+    for _ in range(args.info_iters):
+        t0 = time.perf_counter()
+        _load_info()
+        samples.append(time.perf_counter() - t0)
+    rep = store.db_report()
+    store.close_db()
+    return {
+        "rows": args.info_rows,
+        "populate_s": round(populate_s, 2),
+        "db_mb": round((rep["db_bytes"] + rep["wal_bytes"]) / 1e6, 1),
+        "load_info": latency_summary(samples),
+    }
+
+
+async def bench_egress(args) -> dict:
+    wsim = await WeverseSim(latency=args.latency, jitter=args.jitter, size_kb=args.page_kb).start()
+    url = wsim.add_products(1)[0]
+    proxies = [await ProxySim(latency).start() for latency in (0.01, 0.05, 0.15)]
+    await weverse.close_client()
+    await weverse.init_client([egress.Egress(f"proxy{i + 1}", proxy=p.url) for i, p in enumerate(proxies)])
+
+    async def round_(n: int) -> dict:
+        served: dict[str, int] = {}
+        errors = 0
+        samples = []
+        for _ in range(n):
+            t0 = time.perf_counter()
+            try:
+                result = await weverse.fetch_status(url, conditional=False)
+                served[result.egress] = served.get(result.egress, 0) + 1
+                samples.append(time.perf_counter() - t0)
+            except Exception:
+                errors += 1
+        return {"served": served, "errors": errors, **latency_summary(samples)}
+
+    try:
+        healthy = await round_(args.fetch_n)
+        probes = [(await weverse.fetch_status(url, conditional=False, rank=i)).egress for i in range(3)]
+        proxies[0].fail = True  # se cae el más rápido
+        failover = await round_(args.fetch_n)
+    finally:
+        await weverse.close_client()
+        for p in proxies:
+            await p.stop()
+        await wsim.stop()
+    return {"healthy": healthy, "confirm_probes": probes, "fastest_down": failover}
+
+
+async def sequential_confirm(url: str, wait: float) -> bool:
+    """double_confirm_available original: lectura, espera fija, segunda lectura."""
+    first = await weverse.fetch_status(url, conditional=False)
+    if not first.available:
+        return False
+    await asyncio.sleep(wait)
+    return (await weverse.fetch_status(url, conditional=False)).available
+
+
+async def bench_confirm(args) -> dict:
+    """Tiempo hasta el veredicto y requests a Weverse por confirmación, restock real y falsa alarma."""
+    sim = await WeverseSim(latency=args.latency, jitter=args.jitter, size_kb=args.page_kb).start()
+    url = sim.add_products(1)[0]
+    await weverse.init_client()
+    strategies = (
+        ("quorum", lambda: confirm_available(url)),
+        ("sequential", lambda: sequential_confirm(url, args.confirm_wait)),
+    )
+    out = {}
+    try:
+        await weverse.fetch_status(url, conditional=False)  # warm-up (conexión)
+        for state in ("available", "soldout"):
+            sim.set_state(state)
+            out[state] = {}
+            for name, fn in strategies:
+                samples, requests_per, verdicts = [], [], set()
+                for _ in range(args.confirm_trials):
+                    before = sim.requests
+                    t0 = time.perf_counter()
+                    verdicts.add(await fn())
+                    samples.append(time.perf_counter() - t0)
+                    await asyncio.sleep(args.latency * 3)  # que terminen las sondas canceladas
+                    requests_per.append(sim.requests - before)
+                out[state][name] = {
+                    "verdicts": sorted(verdicts),
+                    "requests_per_confirm": round(sum(requests_per) / len(requests_per), 2),
+                    **latency_summary(samples),
+                }
+    finally:
+        await weverse.close_client()
+        await sim.stop()
+    return out
+
+
+async def bench_calls(args, tmpdir: str) -> dict:
+    """
+    Cuántas llamadas cuesta cada flujo contra los simuladores:
+    - /check rápido (default): 1 mensaje de espera + 1 edición;
+    - /check anim: la misma secuencia de llamadas que el /check original (respuesta, chat action,
+      barra de progreso con 4 ediciones, "Listo", resultado), ahora en paralelo con el fetch;
+    - 1 tick del monitor sin stock (solo requests a Weverse).
+    """
+    fresh_db(tmpdir, "calls")
+    await store.start_writer()
+    wsim = await WeverseSim(latency=args.latency, jitter=args.jitter, size_kb=args.page_kb).start()
+    tsim = await TelegramSim(latency=args.tg_latency).start()
+    await weverse.init_client()
+    bot = Bot(tsim.token, base_url=tsim.base_url)
+    await bot.initialize()
+
+    for product_id, *_ in store.list_products():
+        store.set_product_enabled(product_id, False)
+    for i, url in enumerate(wsim.add_products(2)):
+        store.add_product(f"BENCH {i}", url)
+    uid = 4242
+    store.subscribe(uid)
+
+    async def measure(fn) -> dict:
+        web, tg, methods = wsim.requests, tsim.calls, dict(tsim.by_method)
+        t0 = time.perf_counter()
+        await fn()
+        elapsed = time.perf_counter() - t0
+        return {
+            "weverse_requests": wsim.requests - web,
+            "telegram_calls": tsim.calls - tg,
+            "telegram_by_method": {m: n - methods.get(m, 0) for m, n in tsim.by_method.items()
+                                   if n - methods.get(m, 0)},
+            "seconds": round(elapsed, 3),
+        }
+
+    def check(text: str):
+        async def run():
+            update = Update.de_json(fake_update(text, uid), bot)
+            context = SimpleNamespace(bot=bot, args=text.split()[1:], job_queue=None)
+            await check_cmd(update, context)
+        return run
+
+    out = {}
+    try:
+        wsim.set_state("soldout")
+        reset_weverse()
+        out["check_fast"] = await measure(check("/check"))
+        reset_weverse()
+        out["check_anim"] = await measure(check("/check anim"))
+        reset_weverse()
+        context = SimpleNamespace(bot=bot, job_queue=None)
+        out["tick_soldout"] = await measure(lambda: _run_check(context, "BENCH"))
+    finally:
+        await stop_dispatcher()
+        await bot.shutdown()
+        await weverse.close_client()
+        await tsim.stop()
+        await wsim.stop()
+        await store.stop_writer()
+        store.close_db()
+    return out
+
+
+ROUTER_MESSAGES = {
+    "button_ping": "🏓 Ping",
+    "button_horarios": "⏰ Horarios",
+    "button_locked": "🔒 Pico Premium",
+    "free_text": "hola, cómo funciona esto?",
+    "free_keyword": "me pasas los horarios",
+}
+
+
+def original_build_keyboard(user_id: int):
+    """build_keyboard original: arma el ReplyKeyboardMarkup en cada respuesta."""
+    premium = is_premium(user_id)
+    prefs = store.get_prefs(user_id) or {}
+    if premium:
+        pico_btn = f"🟢 Pico ON ({PEAK_SECONDS}s)" if prefs.get("peak") else f"⚫ Pico OFF ({BASE_SECONDS}s)"
+        silent_btn = "🔕 Silencio: ON" if prefs.get("silent") else "🔔 Silencio: OFF"
+    else:
+        pico_btn, silent_btn = "🔒 Pico Premium", "🔒 Silencio Premium"
+    return ReplyKeyboardMarkup(
+        [["🔎 Check", "📋 Info"], ["⏰ Horarios", pico_btn], ["📦 Productos", silent_btn], ["🏓 Ping"]],
+        resize_keyboard=True
+    )
+
+
+async def original_text_router(update, context):
+    """text_router original: cadena de substrings sobre el texto en minúsculas."""
+    txt = (update.message.text or "").strip().lower()
+    uid = update.effective_user.id
+    if "pico premium" in txt:
+        await commands.premium_locked(update, "Modo Pico 🔥")
+        return
+    if "silencio premium" in txt:
+        await commands.premium_locked(update, "Modo Silencio 🔕")
+        return
+    if "pico" in txt and ("on" in txt or "off" in txt):
+        await commands.peak_toggle_cmd(update, context)
+        return
+    if "silencio" in txt:
+        await commands.silent_toggle_cmd(update, context)
+        return
+    if "check" in txt or "revis" in txt:
+        await commands.check_cmd(update, context)
+    elif "info" in txt:
+        await commands.info_cmd(update, context)
+    elif "ping" in txt:
+        await commands.ping_cmd(update, context)
+    elif "horarios" in txt:
+        await commands.horarios_cmd(update, context)
+    elif "productos" in txt:
+        await commands.products_cmd(update, context)
+    else:
+        await update.message.reply_text("Usa los botones 👇💜", reply_markup=original_build_keyboard(uid))
+
+
+async def _time_router(router, update, context, iters: int) -> dict:
+    await router(update, context)  # warm-up (cachés de prefs / premium)
+    samples = []
+    for _ in range(iters):
+        t0 = time.perf_counter()
+        await router(update, context)
+        samples.append(time.perf_counter() - t0)
+    ms = latency_summary(samples)
+    return {"mean_us": round(ms["mean_ms"] * 1000, 1), "p95_us": round(ms["p95_ms"] * 1000, 1)}
+
+
+async def bench_router(args, tmpdir: str) -> dict:
+    fresh_db(tmpdir, "router")
+    uid = 4242
+    store.subscribe(uid)
+
+    async def reply_text(*a, **kw):
+        return None
+
+    out = {}
+    for name, text in ROUTER_MESSAGES.items():
+        update = SimpleNamespace(
+            message=SimpleNamespace(text=text, reply_text=reply_text),
+            effective_user=SimpleNamespace(id=uid), effective_chat=SimpleNamespace(id=uid),
+        )
+        context = SimpleNamespace(args=[], job_queue=None)
+        current = await _time_router(text_router, update, context, args.router_iters)
+        # línea base: router original y, en los handlers, el teclado armado en cada respuesta
+        shared_keyboard = commands.build_keyboard
+        commands.build_keyboard = original_build_keyboard
+        try:
+            base = await _time_router(original_text_router, update, context, args.router_iters)
+        finally:
+            commands.build_keyboard = shared_keyboard
+        out[name] = {"iters": args.router_iters, **current,
+                     "baseline_mean_us": base["mean_us"], "baseline_p95_us": base["p95_us"]}
+    store.close_db()
+    return out
+
+
+def phase_breakdown() -> dict:
+    out = {}
+    for phase in ("connect", "ttfb", "body", "parse"):
+        n, avg, p95 = phase_seconds.stats(phase=phase)
+        if n:
+            out[phase] = {"n": n, "mean_ms": round(avg * 1000, 3)}
+    return out
+
+
+# ---------- comparación ----------
+def _flatten(d: dict, prefix: str = "") -> dict:
+    flat = {}
+    for k, v in d.items():
+        key = f"{prefix}.{k}" if prefix else k
+        if isinstance(v, dict):
+            flat.update(_flatten(v, key))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            flat[key] = v
+    return flat
+
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    cur = _flatten(current["scenarios"])
+    base = _flatten(baseline.get("scenarios", {}))
+    lines = []
+    for key in sorted(cur.keys() & base.keys()):
+        if base[key] == 0 or key.endswith((".n", ".iters", ".rows", ".trials", ".subscribers")):
+            continue
+        delta = (cur[key] - base[key]) / base[key] * 100
+        # ms / us / s: menos es mejor; rps / mb_per_s / rows_per_s: más es mejor
+        better = delta > 0 if key.endswith(("rps", "per_s")) else delta < 0
+        mark = "✅" if better else ("⚠️" if abs(delta) >= 10 else "·")
+        lines.append(f"{mark} {key}: {base[key]} → {cur[key]} ({delta:+.1f}%)")
+    return lines
+
+
+async def run(args) -> dict:
+    selected = args.scenarios or list(SCENARIOS)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmpdir:
+        for name in selected:
+            print(f"⏱️ {name}…", file=sys.stderr)
+            start = time.perf_counter()
+            if name == "parse":
+                results[name] = bench_parse(args)
+            elif name == "fetch":
+                results[name] = await bench_fetch(args)
+            elif name == "alert":
+                results[name] = await bench_alert(args, tmpdir)
+            elif name == "store":
+                results[name] = await bench_store(args, tmpdir)
+            elif name == "info":
+                results[name] = await asyncio.to_thread(bench_info, args, tmpdir)
+            elif name == "egress":
+                results[name] = await bench_egress(args)
+            elif name == "confirm":
+                results[name] = await bench_confirm(args)
+            elif name == "calls":
+                results[name] = await bench_calls(args, tmpdir)
+            elif name == "router":
+                results[name] = await bench_router(args, tmpdir)
+            print(f"   listo en {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    if results.keys() & {"fetch", "alert", "egress"}:
+        results["phases"] = phase_breakdown()
+
+    return {
+        "meta": {
+            "git": git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": int(time.time()),
+            "params": {k: v for k, v in vars(args).items() if k not in ("out", "baseline", "scenarios")},
+        },
+        "scenarios": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks offline del bot")
+    parser.add_argument("scenarios", nargs="*", help=f"escenarios: {', '.join(SCENARIOS)} (default: todos)")
+    parser.add_argument("--quick", action="store_true", help="tamaños chicos para una corrida rápida")
+    parser.add_argument("--out", help="archivo JSON de salida (default: stdout)")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--page-kb", type=int, default=250)
+    parser.add_argument("--latency", type=float, default=0.05, help="latencia simulada de Weverse (s)")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--tg-latency", type=float, default=0.03, help="latencia simulada de Telegram (s)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--parse-iters", type=int, default=200)
+    parser.add_argument("--fetch-n", type=int, default=200)
+    parser.add_argument("--alert-trials", type=int, default=5)
+    parser.add_argument("--subscribers", type=int, default=50)
+    parser.add_argument("--store-n", type=int, default=50_000)
+    parser.add_argument("--info-rows", type=int, default=1_000_000)
+    parser.add_argument("--info-iters", type=int, default=50)
+    parser.add_argument("--router-iters", type=int, default=5_000)
+    parser.add_argument("--confirm-trials", type=int, default=3)
+    parser.add_argument("--confirm-wait", type=float, default=6.0, help="espera de la doble lectura original (s)")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"escenario desconocido: {', '.join(sorted(unknown))}")
+
+    if args.quick:
+        args.parse_iters, args.fetch_n, args.alert_trials = 20, 40, 2
+        args.subscribers, args.store_n, args.info_rows, args.info_iters = 10, 5_000, 50_000, 10
+        args.router_iters, args.confirm_trials = 500, 1
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"💾 {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n".join(compare(report, baseline)) or "— nada para comparar", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# tools/fake_update.py
+"""
+Manda un update falso al webhook local (para probar sin Telegram).
+
+    WEBHOOK_SECRET=xxx python tools/fake_update.py "/ping" --url http://127.0.0.1:8080/telegram
+"""
+import argparse
+import os
+import random
+import time
+
+import httpx
+
+
+def fake_update(text: str, user_id: int) -> dict:
+    now = int(time.time())
+    return {
+        "update_id": random.randint(1, 2**31),
+        "message": {
+            "message_id": random.randint(1, 2**31),
+            "date": now,
+            "chat": {"id": user_id, "type": "private", "first_name": "ARMY"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "ARMY"},
+            "text": text,
+            **({"entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]}
+               if text.startswith("/") else {}),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("text", nargs="?", default="/ping")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/telegram")
+    parser.add_argument("--user", type=int, default=12345)
+    parser.add_argument("--secret", default=os.getenv("WEBHOOK_SECRET", ""))
+    parser.add_argument("-n", type=int, default=1, help="cuántos updates mandar")
+    args = parser.parse_args()
+
+    with httpx.Client() as client:
+        start = time.perf_counter()
+        for _ in range(args.n):
+            r = client.post(args.url, json=fake_update(args.text, args.user),
+                            headers={"X-Telegram-Bot-Api-Secret-Token": args.secret})
+            r.raise_for_status()
+        ms = (time.perf_counter() - start) * 1000
+        print(f"✅ {args.n} update(s) enviados en {ms:.0f}ms ({ms / args.n:.1f}ms c/u) -> {r.status_code}")
+
+
+if __name__ == "__main__":
+    main()
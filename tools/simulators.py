@@ -0,0 +1,229 @@
+# tools/simulators.py
+"""
+Simuladores locales para benchmarks (sin tocar Weverse ni Telegram de verdad).
+
+- WeverseSim: sirve páginas de producto agotado / disponible / próximamente,
+  con latencia y tamaño configurables. El estado se puede cambiar en caliente.
+- TelegramSim: Bot API falsa; responde getMe/sendMessage/editMessageText/... y cuenta llamadas por método.
+- ProxySim: proxy HTTP de reenvío (para probar el pool de salidas) con latencia y fallas a pedido.
+
+Todos usan core/httpserver.py, así no suman dependencias.
+"""
+import asyncio
+import json
+import random
+import time
+from urllib.parse import parse_qs
+
+import httpx
+
+from core.httpserver import HttpServer, json_response, text_response
+
+STATES = ("soldout", "available", "coming_soon")
+
+_BUTTON = {
+    "soldout": "Sold out",
+    "available": "Add to cart",
+    "coming_soon": "Coming soon",
+}
+_SALE_STATUS = {
+    "soldout": "SOLD_OUT",
+    "available": "SALE",
+    "coming_soon": "COMING_SOON",
+}
+
+
+def build_page(state: str, size_kb: int = 250, structured: bool = True, seed: int = 0) -> str:
+    """
+    Página parecida a la de la tienda: <head> grande con CSS/JS, el JSON de Next.js
+    (si structured) y el botón de compra casi al final, como en la página real.
+    """
+    rnd = random.Random(seed)
+    filler_word = "lorem ipsum dolor sit amet consectetur adipiscing elit "
+    head = "<head><title>BTS OFFICIAL LIGHT STICK</title>" + "".join(
+        f'<link rel="preload" href="/_next/static/chunks/{rnd.getrandbits(64):x}.js" as="script"/>'
+        for _ in range(40)
+    ) + "</head>"
+
+    next_data = ""
+    if structured:
+        options = [
+            {"saleOptionId": i, "saleOptionName": f"VER.{i}",
+             "saleStatus": _SALE_STATUS[state] if i == 1 else "SOLD_OUT",
+             "stockQuantity": 5 if (state == "available" and i == 1) else 0}
+            for i in range(1, 4)
+        ]
+        payload = {"props": {"pageProps": {"sale": {"saleId": 54189, "name": "ARMY BOMB",
+                                                    "saleOptions": options}}}}
+        next_data = f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(payload)}</script>'
+
+    body_top = f"<body><div id='__next'><h1>BTS OFFICIAL LIGHT STICK VER.4</h1>"
+    tail = f"<button class='buy'>{_BUTTON[state]}</button></div>{next_data}</body>"
+    fill_len = max(0, size_kb * 1024 - len(head) - len(body_top) - len(tail))
+    filler = "<p>" + (filler_word * (fill_len // len(filler_word) + 1))[:fill_len] + "</p>"
+    return "<!DOCTYPE html><html>" + head + body_top + filler + tail + "</html>"
+
+
+class WeverseSim:
+    """GET /sales/<id> → página en el estado actual (por defecto: agotado)."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, size_kb: int = 250, structured: bool = True):
+        self.latency = latency
+        self.jitter = jitter
+        self.state = "soldout"
+        self.requests = 0
+        self._pages = {s: build_page(s, size_kb, structured) for s in STATES}
+        self._server = HttpServer("127.0.0.1", 0)
+        self.paths: list[str] = []
+
+    def add_products(self, n: int) -> list[str]:
+        for i in range(len(self.paths), len(self.paths) + n):
+            path = f"/sales/{54189 + i}"
+            self._server.route("GET", path, self._page)
+            self.paths.append(path)
+        return [self.url(p) for p in self.paths[-n:]]
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self._server.port}{path}"
+
+    def set_state(self, state: str):
+        assert state in STATES
+        self.state = state
+
+    async def _page(self, request):
+        self.requests += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        return text_response(self._pages[self.state], content_type="text/html; charset=utf-8")
+
+    async def start(self):
+        await self._server.start()
+        return self
+
+    async def stop(self):
+        await self._server.stop()
+
+
+class TelegramSim:
+    """
+    Bot API falsa en /bot<token>/<método>. Guarda (monotonic, chat_id, text) de cada sendMessage.
+    Con retry_every=N, cada N-ésimo envío responde 429 (retry_after) como Telegram.
+    """
+
+    METHODS = ("getMe", "sendMessage", "editMessageText", "sendChatAction", "deleteWebhook", "setWebhook",
+               "getUpdates")
+
+    def __init__(self, token: str = "123456:BENCH", latency: float = 0.0, retry_every: int = 0):
+        self.token = token
+        self.latency = latency
+        self.retry_every = retry_every
+        self.messages: list[tuple[float, int, str]] = []
+        self.calls = 0
+        self.by_method: dict[str, int] = {}
+        self._first = asyncio.Event()
+        self._server = HttpServer("127.0.0.1", 0)
+        for method in self.METHODS:
+            self._server.route("POST", f"/bot{token}/{method}", self._make_handler(method))
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.port}/bot"
+
+    def _make_handler(self, method: str):
+        async def handler(request):
+            return await self._handle(method, request)
+        return handler
+
+    @staticmethod
+    def _params(request) -> dict:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            return request.json() or {}
+        return {k: v[0] for k, v in parse_qs(request.body.decode()).items()}
+
+    async def _handle(self, method: str, request):
+        self.calls += 1
+        self.by_method[method] = self.by_method.get(method, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        params = self._params(request)
+
+        if method == "getMe":
+            return json_response({"ok": True, "result": {
+                "id": int(self.token.split(":")[0]), "is_bot": True, "first_name": "Bench", "username": "bench_bot"}})
+        if method == "sendMessage":
+            if self.retry_every and self.calls % self.retry_every == 0:
+                return json_response({"ok": False, "error_code": 429, "description": "Too Many Requests",
+                                      "parameters": {"retry_after": 1}}, status=429)
+            chat_id = int(params.get("chat_id", 0))
+            text = params.get("text", "")
+            self.messages.append((time.monotonic(), chat_id, text))
+            self._first.set()
+            return json_response({"ok": True, "result": {
+                "message_id": len(self.messages), "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"}, "text": text}})
+        if method == "editMessageText":
+            chat_id = int(params.get("chat_id", 0))
+            return json_response({"ok": True, "result": {
+                "message_id": int(params.get("message_id", 0)), "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"}, "text": params.get("text", "")}})
+        if method == "getUpdates":
+            return json_response({"ok": True, "result": []})
+        return json_response({"ok": True, "result": True})
+
+    async def wait_first_message(self, timeout: float = 30.0) -> float:
+        await asyncio.wait_for(self._first.wait(), timeout)
+        return self.messages[0][0]
+
+    def reset(self):
+        self.messages.clear()
+        self._first = asyncio.Event()
+
+    async def start(self):
+        await self._server.start()
+        return self
+
+    async def stop(self):
+        await self._server.stop()
+
+
+class ProxySim:
+    """
+    Proxy HTTP de reenvío (GET http://host/... HTTP/1.1) para armar un pool de salidas local.
+    latency: demora agregada; fail=True responde 502 como un proxy caído.
+    """
+
+    _HOP = {"connection", "proxy-connection", "keep-alive", "proxy-authorization", "te", "trailers",
+            "transfer-encoding", "upgrade", "host", "content-length"}
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.fail = False
+        self.requests = 0
+        self._client: httpx.AsyncClient | None = None
+        self._server = HttpServer("127.0.0.1", 0)
+        self._server.fallback(self._forward)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.port}"
+
+    async def _forward(self, request):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail or not request.target.startswith("http://"):
+            return text_response("bad gateway", 502)
+        headers = {k: v for k, v in request.headers.items() if k not in self._HOP}
+        r = await self._client.request(request.method, request.target, headers=headers, content=request.body)
+        out = {k: v for k, v in r.headers.items() if k.lower() not in self._HOP | {"content-encoding"}}
+        return r.status_code, out, r.content
+
+    async def start(self):
+        self._client = httpx.AsyncClient(trust_env=False)
+        await self._server.start()
+        return self
+
+    async def stop(self):
+        await self._server.stop()
+        await self._client.aclose()
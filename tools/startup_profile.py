@@ -0,0 +1,110 @@
+# tools/startup_profile.py
+"""
+Perfil del arranque en frío (python main.py --profile-startup).
+
+Corre build_app() en un proceso nuevo con `python -X importtime` y reporta:
+- tiempo hasta tener la Application armada (sin conectarse a Telegram, sobre una copia de la DB),
+- memoria residente (RSS) antes y después,
+- imports más caros agrupados por paquete y los módulos más lentos.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource, sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+rss0 = rss_kb()
+import core.store, sys
+core.store.DB_PATH = sys.argv[1]  # copia temporal: el perfil no toca la bot.db real
+import main
+t_main = time.perf_counter()
+app = main.build_app()
+t_app = time.perf_counter()
+from core.store import close_db
+close_db()
+print("__PROFILE__" + json.dumps({
+    "main_ms": (t_main - t0) * 1000, "build_ms": (t_app - t0) * 1000,
+    "rss_start_kb": rss0, "rss_kb": rss_kb(),
+}))
+"""
+
+
+def _parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Líneas 'import time: self | cumulative | módulo' → [(módulo, self_us, cumulative_us)]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|")
+            rows.append((name.strip(), int(self_us), int(cum_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def run_profile() -> dict:
+    env = {**os.environ, "BOT_TOKEN": os.environ.get("BOT_TOKEN") or "0:PROFILE"}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bot.db")
+        src = os.path.join(ROOT, "core", "bot.db")
+        for suffix in ("", "-wal"):
+            if os.path.exists(src + suffix):
+                shutil.copyfile(src + suffix, db + suffix)
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _CHILD, db],
+            cwd=ROOT, env=env, capture_output=True, text=True, timeout=120,
+        )
+    marker = next((l for l in proc.stdout.splitlines() if l.startswith("__PROFILE__")), None)
+    if proc.returncode != 0 or marker is None:
+        raise RuntimeError(f"el arranque falló:\n{proc.stderr[-2000:]}")
+
+    result = json.loads(marker[len("__PROFILE__"):])
+    rows = _parse_importtime(proc.stderr)
+    by_package: dict[str, int] = {}
+    for name, self_us, _ in rows:
+        top = name.split(".")[0]
+        by_package[top] = by_package.get(top, 0) + self_us
+    result["import_ms"] = sum(self_us for _, self_us, _ in rows) / 1000
+    result["modules"] = len(rows)
+    result["packages"] = sorted(((k, v / 1000) for k, v in by_package.items()), key=lambda kv: -kv[1])
+    result["slowest"] = sorted(((n, s / 1000) for n, s, _ in rows), key=lambda kv: -kv[1])
+    return result
+
+
+def profile_startup(top: int = 12):
+    print("🔬 Midiendo arranque en frío…")
+    r = run_profile()
+    print(f"⚡ Application lista en {r['build_ms']:.0f} ms (main.py: {r['main_ms']:.0f} ms)")
+    print(f"📦 Imports: {r['modules']} módulos, {r['import_ms']:.0f} ms")
+    print(f"🧠 RSS: {r['rss_start_kb'] / 1024:.1f} MB al inicio → {r['rss_kb'] / 1024:.1f} MB")
+    print("\nPor paquete (ms):")
+    for name, ms in r["packages"][:top]:
+        print(f"  {ms:8.1f}  {name}")
+    print("\nMódulos más lentos (ms, sin hijos):")
+    for name, ms in r["slowest"][:top]:
+        print(f"  {ms:8.1f}  {name}")
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT)
+    profile_startup()
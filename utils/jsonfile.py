@@ -0,0 +1,93 @@
+# utils/jsonfile.py
+import json
+import os
+import tempfile
+import threading
+import time
+
+from config import STATE_RELOAD_SECONDS
+
+
+class CachedJsonFile:
+    """
+    JSON en memoria con escritura atómica (temp + rename).
+    Se recarga solo si el mtime del archivo cambió (edición externa);
+    el stat se hace como mucho 1 vez cada STATE_RELOAD_SECONDS.
+    Se lee también desde hilos (asyncio.to_thread): recarga y guardado van con lock.
+    """
+
+    def __init__(self, path: str, default: dict, normalize=None):
+        self.path = path
+        self.default = default
+        self.normalize = normalize
+        self._data: dict | None = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _stat_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> dict:
+        merged = dict(self.default)
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    merged.update(json.load(f) or {})
+            except Exception:
+                merged = dict(self.default)
+        if self.normalize:
+            merged = self.normalize(merged)
+        return merged
+
+    def data(self) -> dict:
+        data = self._data
+        if data is not None and time.monotonic() - self._checked_at < STATE_RELOAD_SECONDS:
+            return data  # camino rápido: sin lock
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self, force: bool = False) -> dict:
+        # llamar con el lock tomado
+        now = time.monotonic()
+        if force or self._data is None or now - self._checked_at >= STATE_RELOAD_SECONDS:
+            mtime = self._stat_mtime()
+            if self._data is None or mtime != self._mtime:
+                self._data = self._load()
+                self._mtime = mtime
+            self._checked_at = now
+        return self._data
+
+    def save(self, data: dict):
+        with self._lock:
+            self._save(data)
+
+    def update(self, fn):
+        """
+        Leer-modificar-escribir atómico: fn(datos actuales) devuelve el dict nuevo,
+        o None para no escribir. Todo bajo el lock, así dos escrituras
+        concurrentes no se pisan. Devuelve lo que devolvió fn.
+        """
+        with self._lock:
+            new = fn(self._refresh(force=True))
+            if new is not None:
+                self._save(new)
+            return new
+
+    def _save(self, data: dict):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._data = self.normalize(dict(data)) if self.normalize else dict(data)
+        self._mtime = self._stat_mtime()
+        self._checked_at = time.monotonic()
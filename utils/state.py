@@ -1,10 +1,9 @@
 # utils/state.py
-import json
 import os
-from threading import Lock
+
+from utils.jsonfile import CachedJsonFile
 
 _STATE_FILE = os.path.join(os.path.dirname(__file__), "state.json")
-_lock = Lock()
 
 _DEFAULT = {
     "peak_enabled": False,
@@ -13,47 +12,15 @@ _DEFAULT = {
     "silent_end": "07:00",
 }
 
-def _load():
-    if not os.path.exists(_STATE_FILE):
-        return dict(_DEFAULT)
-    try:
-        with open(_STATE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        # merge defaults
-        merged = dict(_DEFAULT)
-        merged.update(data or {})
-        return merged
-    except Exception:
-        return dict(_DEFAULT)
-
-def _save(data: dict):
-    os.makedirs(os.path.dirname(_STATE_FILE), exist_ok=True)
-    with open(_STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+# Solo lectura: defaults globales para la migración a prefs por usuario
+_state = CachedJsonFile(_STATE_FILE, _DEFAULT)
 
 def is_peak_enabled() -> bool:
-    with _lock:
-        return bool(_load().get("peak_enabled", False))
-
-def toggle_peak_enabled() -> bool:
-    with _lock:
-        data = _load()
-        data["peak_enabled"] = not bool(data.get("peak_enabled", False))
-        _save(data)
-        return bool(data["peak_enabled"])
+    return bool(_state.data().get("peak_enabled", False))
 
 def is_silent_enabled() -> bool:
-    with _lock:
-        return bool(_load().get("silent_enabled", False))
-
-def toggle_silent_enabled() -> bool:
-    with _lock:
-        data = _load()
-        data["silent_enabled"] = not bool(data.get("silent_enabled", False))
-        _save(data)
-        return bool(data["silent_enabled"])
+    return bool(_state.data().get("silent_enabled", False))
 
 def get_silent_window():
-    with _lock:
-        data = _load()
-        return str(data.get("silent_start", "23:00")), str(data.get("silent_end", "07:00"))
\ No newline at end of file
+    data = _state.data()
+    return str(data.get("silent_start", "23:00")), str(data.get("silent_end", "07:00"))